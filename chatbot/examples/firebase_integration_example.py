@@ -6,67 +6,241 @@ for seamless data saving and retrieval.
 """
 
 import os
-import requests
-import json
+import time
+import asyncio
+import httpx
+import orjson
+from collections import deque
 from datetime import datetime
-from chatbot.langchain.chat_model import chat_chain
+from functools import lru_cache
+from chatbot.langchain.chat_model import get_chat_chain, get_prompt, get_llm
+from chatbot.langchain.history import trim_history
 from chatbot.schemas.chat_response import ChatResponse
 
 # Firebase configuration
 FIREBASE_PROJECT_ID = "your-project-id"  # Replace with your actual project ID
 FIREBASE_REGION = "us-central1"  # Or your deployed region
 FIREBASE_BASE_URL = f"https://{FIREBASE_REGION}-{FIREBASE_PROJECT_ID}.cloudfunctions.net"
+FIREBASE_TIMEOUT = httpx.Timeout(10, connect=3)
+
+# Shared async HTTP client so HTTPS connections to Cloud Functions are kept alive
+# between calls instead of paying DNS + TLS handshake on every request
+_CLIENT = httpx.AsyncClient(
+    http2=True,
+    timeout=FIREBASE_TIMEOUT,
+    limits=httpx.Limits(max_keepalive_connections=20)
+)
+
+# Event loop backing the synchronous wrappers. It stays open (unlike asyncio.run)
+# so the pooled connections in _CLIENT remain usable across calls.
+_LOOP = asyncio.new_event_loop()
+
+def _run_sync(coro):
+    """
+    Run a coroutine to completion from synchronous code
+    """
+    return _LOOP.run_until_complete(coro)
+
+# Streaming pipeline yielding progressively completed response dicts
+@lru_cache(maxsize=1)
+def get_stream_chain():
+    from langchain_core.output_parsers import JsonOutputParser
+    from langchain_core.runnables import RunnablePassthrough
+    return (
+        RunnablePassthrough.assign(history=lambda x: trim_history(x.get("history")))
+        | get_prompt()
+        | get_llm().bind(response_format={"type": "json_object"})
+        | JsonOutputParser()
+    )
+
+# Structured data sections of a chat response
+DATA_SECTIONS = ("personalInfo", "financialInfo", "goals")
+
+# Confidence scoring: (section, weight, fields expected for a full score)
+FIELD_SECTION_SCORES = (("personalInfo", 0.3, 5), ("financialInfo", 0.4, 4))
+GOALS_SCORE_WEIGHT = 0.3
+
+# Most recent messages kept as conversation history (oldest drop off automatically)
+HISTORY_MAX_MESSAGES = 20
+
+# User context is re-fetched after this many seconds to pick up out-of-band writes
+CONTEXT_CACHE_TTL = 60
+
+# Conversation logs are uploaded in the background once this many are queued
+# or this many seconds have passed; the queue is capped so a dead endpoint
+# can't grow memory without bound (oldest logs are dropped first)
+LOG_BATCH_SIZE = 20
+LOG_BATCH_INTERVAL = 30
+MAX_PENDING_LOGS = 500
+
+# Local session transcripts
+SESSION_LOG_DIR = "sessions"
+SESSION_LOG_FLUSH_INTERVAL = 5  # seconds between file flushes
+
+def _json_default(obj):
+    """
+    Serialize objects orjson doesn't handle natively (e.g. Pydantic goals)
+    """
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return str(obj)
+
+class SessionLogger:
+    """
+    Append-only JSONL transcript for one chat session
+
+    Each record is a single appended line, so logging a turn costs the same no
+    matter how long the session is. Writes are buffered and flushed every
+    flush_interval seconds, so a crash can lose the records written since the
+    last flush (up to flush_interval seconds of the session).
+    Record types: session_metadata (at open), user / ai (per turn) and
+    message_update (corrections to an earlier message).
+    """
+    def __init__(self, session_id, log_dir=SESSION_LOG_DIR, flush_interval=SESSION_LOG_FLUSH_INTERVAL):
+        os.makedirs(log_dir, exist_ok=True)
+        self.path = os.path.join(log_dir, f"{session_id}.jsonl")
+        self._file = open(self.path, "ab")
+        self._flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        self.turns = 0
+        
+        self.write("session_metadata", {"sessionId": session_id})
+    
+    def write(self, record_type, payload):
+        """
+        Append one record; the file is flushed at most every flush_interval seconds
+        """
+        record = {"type": record_type, "timestamp": datetime.now(), **payload}
+        self._file.write(orjson.dumps(record, default=_json_default) + b"\n")
+        
+        now = time.monotonic()
+        if now - self._last_flush >= self._flush_interval:
+            self._file.flush()
+            self._last_flush = now
+    
+    def log_turn(self, user_message, ai_message, extracted_data, confidence):
+        """
+        Append the user and AI records for one conversation turn
+        """
+        self.turns += 1
+        self.write("user", {"turn": self.turns, "message": user_message})
+        self.write("ai", {
+            "turn": self.turns,
+            "message": ai_message,
+            "extractedData": extracted_data,
+            "confidence": confidence
+        })
+    
+    def update_message(self, turn, message):
+        """
+        Record a correction to an earlier AI message without rewriting the file
+        """
+        self.write("message_update", {"turn": turn, "message": message})
+    
+    def close(self):
+        if not self._file.closed:
+            self._file.flush()
+            self._file.close()
 
 class RT1MFirebaseIntegration:
-    def __init__(self, user_token):
+    def __init__(self, user_token, merge_log=False):
         """
         Initialize with user's Firebase ID token
+
+        With merge_log, a turn's conversation log rides along in the
+        updateUserDataFromAI request (as a "log" field) instead of a separate
+        logAIConversation call. Only enable it against an endpoint that fans
+        the log out - the functions in server/ don't, so by default the save
+        and the log are sent concurrently as two requests.
         """
         self.user_token = user_token
+        self.merge_log = merge_log
         self.session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
-    def _make_firebase_request(self, endpoint, data):
-        """
-        Make authenticated request to Firebase Cloud Function
-        """
-        url = f"{FIREBASE_BASE_URL}/{endpoint}"
-        headers = {
+        # Authorization is fixed per user, so build the headers once
+        self._headers = {
             "Authorization": f"Bearer {self.user_token}",
             "Content-Type": "application/json"
         }
+        self._base_url = f"{FIREBASE_BASE_URL}/"
+        
+        # Turns are logged locally and uploaded to Firebase in batches
+        self.session_log = SessionLogger(self.session_id)
+        self._pending_logs = deque(maxlen=MAX_PENDING_LOGS)
+        self._last_log_upload = time.monotonic()
+        self._upload_task = None
+        
+        # Per-session copy of the user's AI context, patched locally after each save
+        self._context_cache = None
+        self._context_dirty = True
+        self._context_fetched_at = 0.0
+        
+        # Conversation history as ready-made LangChain messages
+        self._history = deque(maxlen=HISTORY_MAX_MESSAGES)
         
-        response = requests.post(url, json={"data": data}, headers=headers)
-        return response.json()
+    async def _make_firebase_request(self, endpoint, data):
+        """
+        Make authenticated request to Firebase Cloud Function
+        """
+        response = await _CLIENT.post(
+            self._base_url + endpoint,
+            content=orjson.dumps({"data": data}, default=_json_default),
+            headers=self._headers
+        )
+        return orjson.loads(response.content)
     
-    def get_user_context(self):
+    async def aget_user_context(self):
         """
         Get user's current data for AI context
         """
+        if (
+            not self._context_dirty
+            and time.monotonic() - self._context_fetched_at < CONTEXT_CACHE_TTL
+        ):
+            return self._context_cache
+        
         try:
-            result = self._make_firebase_request("getAIConversationContext", {})
+            result = await self._make_firebase_request("getAIConversationContext", {})
             if result.get("success"):
-                return result.get("data", {})
+                self._context_cache = result.get("data", {})
+                self._context_dirty = False
+                self._context_fetched_at = time.monotonic()
+                return self._context_cache
             return {}
         except Exception as e:
             print(f"Error getting user context: {e}")
             return {}
     
+    def get_user_context(self):
+        """
+        Synchronous wrapper around aget_user_context
+        """
+        return _run_sync(self.aget_user_context())
+    
     def process_conversation(self, user_message):
+        """
+        Synchronous wrapper around aprocess_conversation
+        """
+        return _run_sync(self.aprocess_conversation(user_message))
+    
+    async def aprocess_conversation(self, user_message):
         """
         Process a conversation turn with AI data extraction and Firebase saving
         """
         try:
-            # Get current user context for better AI responses
-            user_context = self.get_user_context()
+            conversation_history = list(self._history)
             
-            # Build conversation history (you might want to store this)
-            conversation_history = []  # Add previous messages here
+            # Get current user context for better AI responses while the
+            # AI response with structured data extraction is generated
+            user_context, ai_response = await asyncio.gather(
+                self.aget_user_context(),
+                get_chat_chain().ainvoke({
+                    "input": user_message,
+                    "history": conversation_history
+                })
+            )
             
-            # Get AI response with structured data extraction
-            ai_response = chat_chain.invoke({
-                "input": user_message,
-                "history": conversation_history
-            })
+            self._remember_turn(user_message, ai_response.message)
             
             # Extract the structured data
             extracted_data = {
@@ -75,30 +249,30 @@ class RT1MFirebaseIntegration:
                 "goals": ai_response.goals
             }
             
-            # Calculate confidence score (simple version)
-            confidence = self._calculate_confidence(extracted_data)
+            # Clean the data and calculate confidence score in one pass
+            # (most turns carry no structured data, so check that first)
+            clean_data, confidence = self._clean_and_score(extracted_data)
             
-            # Save extracted data to Firebase if confidence is high enough
-            if confidence > 0.5 and any(extracted_data.values()):
-                update_result = self._save_ai_data_to_firebase(
-                    extracted_data, 
-                    confidence
-                )
-                print(f"Data saved to Firebase: {update_result}")
+            data_saved = bool(clean_data) and confidence > 0.5
             
-            # Log the conversation for analytics
-            self._log_conversation(
+            # Log the conversation and save extracted data to Firebase if
+            # confidence is high enough, in a single request
+            update_result = await self._finalize_turn(
                 user_message, 
-                ai_response, 
+                ai_response.message, 
                 extracted_data, 
-                confidence
+                clean_data, 
+                confidence, 
+                save=data_saved
             )
+            if data_saved:
+                print(f"Data saved to Firebase: {update_result}")
             
             return {
                 "ai_message": ai_response.message,
                 "extracted_data": extracted_data,
                 "confidence": confidence,
-                "data_saved": confidence > 0.5 and any(extracted_data.values())
+                "data_saved": data_saved
             }
             
         except Exception as e:
@@ -110,83 +284,277 @@ class RT1MFirebaseIntegration:
                 "data_saved": False
             }
     
-    def _save_ai_data_to_firebase(self, extracted_data, confidence):
+    async def astream_conversation(self, user_message):
         """
-        Save AI extracted data to Firebase using the new AI endpoints
+        Stream the AI message as it is generated, yielding text deltas
+
+        Data sections are saved to Firebase as soon as they are complete and the
+        confidence so far is high enough, overlapping the save with generation.
         """
-        # Clean the data (remove None values)
-        clean_data = {}
+        conversation_history = list(self._history)
+        sent = ""
+        latest = {}
+        dispatched = set()
+        save_tasks = []
         
-        if extracted_data.get("personalInfo"):
-            clean_data["personalInfo"] = {
-                k: v for k, v in extracted_data["personalInfo"].items() 
-                if v is not None
-            }
+        try:
+            async for partial in get_stream_chain().astream({
+                "input": user_message,
+                "history": conversation_history
+            }):
+                if not isinstance(partial, dict):
+                    continue
+                latest = partial
+                
+                message = partial.get("message")
+                if isinstance(message, str) and len(message) > len(sent):
+                    yield message[len(sent):]
+                    sent = message
+                
+                # A section is complete once the model has moved on to a later key
+                closed = {k: partial[k] for k in list(partial)[:-1] if k in DATA_SECTIONS}
+                task = self._dispatch_closed_sections(closed, dispatched)
+                if task:
+                    save_tasks.append(task)
+            
+            # Everything is complete once the stream ends
+            task = self._dispatch_closed_sections(
+                {k: latest.get(k) for k in DATA_SECTIONS}, dispatched
+            )
+            if task:
+                save_tasks.append(task)
+            
+        except Exception as e:
+            print(f"Error streaming conversation: {e}")
+            if not sent:
+                yield "I'm sorry, I encountered an error. Please try again."
         
-        if extracted_data.get("financialInfo"):
-            clean_data["financialInfo"] = {
-                k: v for k, v in extracted_data["financialInfo"].items() 
-                if v is not None
-            }
+        # Whatever the user saw is part of the conversation, so it is recorded
+        # before (and regardless of) the saves, as in aprocess_conversation
+        if sent:
+            extracted_data = {k: latest.get(k) for k in DATA_SECTIONS}
+            self._remember_turn(user_message, sent)
+            self._queue_log(self._log_conversation(
+                user_message,
+                sent,
+                extracted_data,
+                self._clean_and_score(extracted_data)[1]
+            ))
+        
+        # Saves started mid-stream are awaited even if the stream failed; one
+        # failed save doesn't abandon the others
+        if save_tasks:
+            results = await asyncio.gather(*save_tasks, return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    print(f"Error saving to Firebase: {result}")
+                else:
+                    print(f"Data saved to Firebase: {result}")
+    
+    def _remember_turn(self, user_message, ai_message):
+        """
+        Add a turn to the bounded history, built once as message objects
+        """
+        from langchain_core.messages import AIMessage, HumanMessage
+        self._history.append(HumanMessage(content=user_message))
+        self._history.append(AIMessage(content=ai_message))
+    
+    def _dispatch_closed_sections(self, closed, dispatched):
+        """
+        Start a background save for closed sections not yet sent, if confidence allows
+        """
+        clean_data, confidence = self._clean_and_score(closed)
+        pending = {k: v for k, v in clean_data.items() if k not in dispatched}
+        if not pending or confidence <= 0.5:
+            return None
+        
+        dispatched.update(pending)
+        return asyncio.create_task(self._save_ai_data_to_firebase(pending, confidence))
+    
+    async def _finalize_turn(self, user_message, ai_message, extracted_data, clean_data, confidence, save):
+        """
+        Log a conversation turn and optionally save its data, using at most one request
+        """
+        log = self._log_conversation(user_message, ai_message, extracted_data, confidence)
+        
+        # Nothing to save: the log waits for the next batch upload
+        if not save or not clean_data:
+            self._queue_log(log)
+            return None
+        
+        if self.merge_log:
+            return await self._save_ai_data_to_firebase(clean_data, confidence, log=log)
         
-        if extracted_data.get("goals"):
-            clean_data["goals"] = [
-                goal for goal in extracted_data["goals"] 
-                if goal and goal.get("title")
-            ]
+        # Endpoint can't take the log - send both requests concurrently instead
+        save_result, log_result = await asyncio.gather(
+            self._save_ai_data_to_firebase(clean_data, confidence),
+            self._make_firebase_request("logAIConversation", log),
+            return_exceptions=True
+        )
+        if isinstance(log_result, Exception):
+            self._queue_log(log)
+        if isinstance(save_result, Exception):
+            raise save_result
+        return save_result
+    
+    async def _save_ai_data_to_firebase(self, clean_data, confidence, log=None):
+        """
+        Save AI extracted data (as returned by _clean_and_score) to Firebase using the new AI endpoints
+        """
+        if not clean_data:
+            return {"success": False, "message": "No data to save"}
         
         # Use the main AI update endpoint
-        if clean_data:
-            return self._make_firebase_request("updateUserDataFromAI", {
-                **clean_data,
-                "source": "rt1m_chatbot",
-                "confidence": confidence,
-                "sessionId": self.session_id
-            })
+        payload = {
+            **clean_data,
+            "source": "rt1m_chatbot",
+            "confidence": confidence,
+            "sessionId": self.session_id
+        }
+        if log:
+            payload["log"] = log
         
-        return {"success": False, "message": "No data to save"}
+        result = await self._make_firebase_request("updateUserDataFromAI", payload)
+        self._update_context_cache(clean_data, result.get("success"))
+        return result
     
-    def _log_conversation(self, user_message, ai_response, extracted_data, confidence):
+    def _update_context_cache(self, clean_data, saved):
+        """
+        Apply saved data to the cached context so the next turn can skip a fetch
+        """
+        if not saved or self._context_cache is None:
+            self._context_dirty = True
+            return
+        
+        for section, value in clean_data.items():
+            if isinstance(value, list):
+                self._context_cache.setdefault(section, []).extend(value)
+            else:
+                self._context_cache.setdefault(section, {}).update(value)
+    
+    def _log_conversation(self, user_message, ai_message, extracted_data, confidence):
         """
         Log conversation for analytics and improvement
+
+        Appends the turn to the local transcript and returns the logAIConversation record
         """
         try:
-            self._make_firebase_request("logAIConversation", {
-                "userMessage": user_message,
-                "aiResponse": ai_response.message,
-                "extractedData": extracted_data,
-                "confidence": confidence,
-                "sessionId": self.session_id,
-                "timestamp": datetime.now().isoformat()
-            })
+            self.session_log.log_turn(user_message, ai_message, extracted_data, confidence)
         except Exception as e:
             print(f"Error logging conversation: {e}")
+        
+        return {
+            "userMessage": user_message,
+            "aiResponse": ai_message,
+            "extractedData": extracted_data,
+            "confidence": confidence,
+            "sessionId": self.session_id,
+            "timestamp": datetime.now()
+        }
     
-    def _calculate_confidence(self, extracted_data):
+    def _queue_log(self, log):
         """
-        Simple confidence calculation based on data completeness
+        Queue a log for batch upload; a background upload starts once
+        LOG_BATCH_SIZE logs are waiting or LOG_BATCH_INTERVAL seconds have passed
         """
-        score = 0
+        if len(self._pending_logs) == self._pending_logs.maxlen:
+            print("Conversation log queue full, dropping the oldest log")
+        self._pending_logs.append(log)
+        
+        due = (
+            len(self._pending_logs) >= LOG_BATCH_SIZE
+            or time.monotonic() - self._last_log_upload >= LOG_BATCH_INTERVAL
+        )
+        if due and (self._upload_task is None or self._upload_task.done()):
+            self._upload_task = asyncio.get_running_loop().create_task(self.aupload_conversation_logs())
+    
+    async def aupload_conversation_logs(self):
+        """
+        Upload logged turns to Firebase concurrently, off the per-turn critical path
+        """
+        self._last_log_upload = time.monotonic()
+        pending = list(self._pending_logs)
+        self._pending_logs.clear()
+        results = await asyncio.gather(
+            *(self._make_firebase_request("logAIConversation", log) for log in pending),
+            return_exceptions=True
+        )
+        
+        # Keep failed uploads for the next batch
+        failed = [log for log, result in zip(pending, results) if isinstance(result, Exception)]
+        if failed:
+            print(f"Error uploading {len(failed)} conversation logs")
+            self._pending_logs.extend(failed)
+        return len(pending) - len(failed)
+    
+    def upload_conversation_logs(self):
+        """
+        Synchronous wrapper around aupload_conversation_logs
+        """
+        return _run_sync(self.aupload_conversation_logs())
+    
+    async def aclose(self):
+        """
+        Wait for any background upload, flush the remaining logs and close the transcript
+        """
+        if self._upload_task is not None:
+            await self._upload_task
+        await self.aupload_conversation_logs()
+        self.session_log.close()
+    
+    def close(self):
+        """
+        Synchronous wrapper around aclose
+        """
+        _run_sync(self.aclose())
+    
+    def _clean_and_score(self, extracted_data):
+        """
+        Remove None values and compute a simple completeness-based confidence in one pass
+
+        Returns (clean_data, confidence)
+        """
+        # No section populated - nothing to clean or score
+        if not any(extracted_data.values()):
+            return {}, 0
         
-        # Personal info scoring
-        if extracted_data.get("personalInfo"):
-            personal_fields = len([v for v in extracted_data["personalInfo"].values() if v])
-            score += min(personal_fields / 5, 1) * 0.3
+        clean_data = {}
+        score = 0
         
-        # Financial info scoring
-        if extracted_data.get("financialInfo"):
-            financial_fields = len([v for v in extracted_data["financialInfo"].values() if v])
-            score += min(financial_fields / 4, 1) * 0.4
+        # Personal and financial info: keep non-None fields, score the filled ones
+        for section, weight, expected_fields in FIELD_SECTION_SCORES:
+            fields = extracted_data.get(section)
+            if not fields:
+                continue
+            
+            clean_fields = {}
+            filled = 0
+            for key, value in fields.items():
+                if value is not None:
+                    clean_fields[key] = value
+                    if value:
+                        filled += 1
+            
+            clean_data[section] = clean_fields
+            score += min(filled / expected_fields, 1) * weight
         
-        # Goals scoring
-        if extracted_data.get("goals"):
-            goals_quality = sum(
-                1 for goal in extracted_data["goals"] 
-                if goal.get("title") and goal.get("category")
-            )
-            score += min(goals_quality / len(extracted_data["goals"]), 1) * 0.3
+        # Goals: keep titled goals, score the ones that also have a category
+        goals = extracted_data.get("goals")
+        if goals:
+            clean_goals = []
+            quality = 0
+            for goal in goals:
+                if hasattr(goal, "model_dump"):
+                    goal = goal.model_dump()
+                if goal and goal.get("title"):
+                    clean_goals.append(goal)
+                    if goal.get("category"):
+                        quality += 1
+            
+            clean_data["goals"] = clean_goals
+            score += min(quality / len(goals), 1) * GOALS_SCORE_WEIGHT
         
-        return min(score, 1.0)
+        return clean_data, min(score, 1.0)
 
 # Example usage
 def example_conversation_flow():
@@ -219,6 +587,9 @@ def example_conversation_flow():
             for data_type, data in result['extracted_data'].items():
                 if data:
                     print(f"  {data_type}: {data}")
+    
+    # Upload the batched conversation logs and close the transcript
+    integration.close()
 
 # Advanced example: Batch processing with smart merging
 def example_smart_financial_update():
@@ -234,14 +605,17 @@ def example_smart_financial_update():
         "currentSavings": 15000
     }
     
-    # Use the smart merger for high-confidence financial data
-    result = integration._make_firebase_request("mergeFinancialDataFromAI", {
-        "financialUpdates": financial_updates,
-        "confidence": 0.9,
-        "source": "rt1m_chatbot"
-    })
-    
-    print(f"Smart financial merge result: {result}")
+    try:
+        # Use the smart merger for high-confidence financial data
+        result = _run_sync(integration._make_firebase_request("mergeFinancialDataFromAI", {
+            "financialUpdates": financial_updates,
+            "confidence": 0.9,
+            "source": "rt1m_chatbot"
+        }))
+        
+        print(f"Smart financial merge result: {result}")
+    finally:
+        integration.close()
 
 if __name__ == "__main__":
     print("RT1M Chatbot Firebase Integration Example")
@@ -1,13 +1,19 @@
-from chatbot.langchain.chat_model import chat_chain
+from chatbot.langchain.chat_model import get_chat_chain
+from chatbot.langchain.chat_router import route_chat_message
 from chatbot.firestore.profile_api import get_user_profile, update_user_profile
 from chatbot.utils.extract_fields import extract_known_fields
 from chatbot.utils.readiness import is_any_goal_ready
 
 def handle_chat_message(user_id: str, message: str) -> str:
+    # 🚦 General questions are answered by the router itself - no profile read, no GPT-4 call
+    decision = route_chat_message(message, user_id)
+    if not decision.needs_user_data and decision.simple_response:
+        return decision.simple_response
+
     profile = get_user_profile(user_id) or {}
 
     # 🧠 Let the LLM generate a natural response
-    response = chat_chain.run(message)
+    response = get_chat_chain().run(message)
 
     # 📥 Extract any structured info from user message
     new_data = extract_known_fields(message)
@@ -15,10 +21,11 @@ def handle_chat_message(user_id: str, message: str) -> str:
         for section, updates in new_data.items():
             if section == "goals":
                 profile.setdefault("goals", [])
+                existing_titles = {x["title"] for x in profile["goals"]}
                 for g in updates:
-                    exists = next((x for x in profile["goals"] if x["title"] == g["title"]), None)
-                    if not exists:
+                    if g["title"] not in existing_titles:
                         profile["goals"].append(g)
+                        existing_titles.add(g["title"])
             else:
                 profile.setdefault(section, {}).update(updates)
 
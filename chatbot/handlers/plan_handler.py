@@ -1,4 +1,4 @@
-from chatbot.langchain.generate_plan import generate_plan
+from chatbot.langchain.generate_plan import generate_plan, generate_plan_stream
 
 def handle_plan_request(user_profile: dict, goal_data: dict) -> dict:
     try:
@@ -7,3 +7,12 @@ def handle_plan_request(user_profile: dict, goal_data: dict) -> dict:
     except Exception as e:
         print("Plan generation error:", e)
         return { "success": False, "error": str(e) }
+
+def handle_plan_stream(user_profile: dict, goal_data: dict):
+    """Yield plan events as they arrive: each completed step, then the full plan"""
+    try:
+        for event in generate_plan_stream(user_profile, goal_data):
+            yield { "success": True, **event }
+    except Exception as e:
+        print("Plan generation error:", e)
+        yield { "success": False, "error": str(e) }
@@ -0,0 +1,37 @@
+"""
+Shared HTTP clients for OpenAI calls
+Every model client reuses the same connection pools, so idle TLS connections to
+api.openai.com are shared between the router, general and full chat models
+"""
+
+from functools import lru_cache
+
+HTTP_TIMEOUT = 30
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 50
+
+def _limits():
+    import httpx
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS
+    )
+
+@lru_cache(maxsize=1)
+def get_http_client():
+    """Process-wide sync HTTP/2 client"""
+    import httpx
+    return httpx.Client(http2=True, timeout=HTTP_TIMEOUT, limits=_limits())
+
+@lru_cache(maxsize=1)
+def get_http_async_client():
+    """Process-wide async HTTP/2 client"""
+    import httpx
+    return httpx.AsyncClient(http2=True, timeout=HTTP_TIMEOUT, limits=_limits())
+
+def shared_client_kwargs() -> dict:
+    """Keyword arguments that point a ChatOpenAI / OpenAIEmbeddings at the shared clients"""
+    return {
+        "http_client": get_http_client(),
+        "http_async_client": get_http_async_client(),
+    }
@@ -0,0 +1,47 @@
+"""
+JSON helpers - orjson (SIMD, returns bytes) when installed, stdlib json otherwise
+Both paths emit compact, non-ASCII-escaped JSON and stringify unknown types
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=str, option=option)
+        except orjson.JSONEncodeError:
+            # Values orjson rejects before `default` runs (e.g. integers beyond
+            # 64 bits) - the stdlib encoder handles them
+            pass
+    return json.dumps(
+        obj,
+        default=str,
+        sort_keys=sort_keys,
+        separators=(",", ":"),
+        ensure_ascii=False
+    ).encode()
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    """Serialize to a compact JSON string"""
+    return dumps_bytes(obj, sort_keys).decode()
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON; errors are json.JSONDecodeError (orjson's subclasses it)"""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than the stdlib (NaN, Infinity, out-of-range numbers);
+            # the stdlib parser decides, and raises for genuinely invalid JSON
+            pass
+    return json.loads(data)
@@ -1,9 +1,6 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.output_parsers import PydanticOutputParser
-from langchain_core.runnables import RunnableSequence
 
 from chatbot.schemas.chat_response import ChatResponse
 from chatbot.langchain.security import (
@@ -11,23 +8,34 @@ from chatbot.langchain.security import (
     validate_json_response, 
     create_safe_fallback_response,
     log_security_event,
+    validate_financial_data,
+    validate_personal_info,
     SecurityViolationError,
     MAX_INPUT_LENGTH,
     MAX_TOKENS
 )
+from chatbot.langchain.history import trim_history
+from chatbot.langchain._http import shared_client_kwargs
 
 # ✅ Load .env
 load_dotenv()
 
-# ✅ Ensure key is loaded
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY not found in .env")
+# ✅ Heavy LangChain/OpenAI imports and clients are built on first use (cheap cold starts)
+def _get_api_key() -> str:
+    """Ensure key is loaded"""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found in .env")
+    return api_key
 
-# ✅ Output parser for structured data
-parser = PydanticOutputParser(pydantic_object=ChatResponse)
+# ✅ Output parser for structured data (legacy chain only - secure_chat_invoke uses JSON mode)
+@lru_cache(maxsize=1)
+def get_parser():
+    from langchain.output_parsers import PydanticOutputParser
+    return PydanticOutputParser(pydantic_object=ChatResponse)
 
 # ✅ Define system behavior with explicit JSON format and security guidelines
+# (sent verbatim as a static message - not a template - so braces are literal)
 system_message = """
 You are a helpful financial assistant that chats naturally with users, but also quietly collects the following types of information:
 
@@ -47,31 +55,72 @@ SECURITY RULES:
 
 IMPORTANT: You must respond with ONLY a valid JSON object in this exact format:
 
-{{
+{
   "message": "your friendly reply here",
-  "personalInfo": {{"name": "Jane", "age": 18}} or null,
-  "financialInfo": {{"income": 50000, "savings": 5000}} or null,
-  "goals": [{{"title": "Save $100k", "category": "financial", "status": "active", "data": {{"target": "100000", "deadline": "2030"}}}}] or null
-}}
+  "personalInfo": {"name": "Jane", "age": 18} or null,
+  "financialInfo": {"income": 50000, "savings": 5000} or null,
+  "goals": [{"title": "Save $100k", "category": "financial", "status": "active", "data": {"target": "100000", "deadline": "2030"}}] or null
+}
 
 Only extract info if it's clearly stated. Don't guess. If no financial info or goals are mentioned, use null for those fields.
 """
 
-# ✅ Full prompt template
-prompt = ChatPromptTemplate.from_messages([
-    ("system", system_message),
-    MessagesPlaceholder(variable_name="history"),
-    ("human", "{input}")
-])
-
-# ✅ GPT-4 model instance with security limits
-llm = ChatOpenAI(
-    model="gpt-4",
-    temperature=0.7,
-    api_key=api_key,
-    max_tokens=MAX_TOKENS,
-    request_timeout=30,
-)
+# ✅ Full prompt template - the system message is a pre-built, byte-identical prefix at index 0,
+# so it is never re-rendered per turn and stays eligible for provider-side prefix caching
+@lru_cache(maxsize=1)
+def get_prompt():
+    from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+    from langchain_core.messages import SystemMessage
+    return ChatPromptTemplate.from_messages([
+        SystemMessage(content=system_message),
+        MessagesPlaceholder(variable_name="history"),
+        ("human", "{input}")
+    ])
+
+# ✅ GPT-4 model instance with security limits (gpt-4-turbo supports JSON mode)
+@lru_cache(maxsize=1)
+def get_llm():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model="gpt-4-turbo",
+        temperature=0.7,
+        api_key=_get_api_key(),
+        max_tokens=MAX_TOKENS,
+        request_timeout=30,
+        **shared_client_kwargs(),
+    )
+
+# ✅ JSON mode - the API guarantees a valid JSON object, parsed straight into ChatResponse
+@lru_cache(maxsize=1)
+def get_structured_llm():
+    return get_llm().with_structured_output(ChatResponse, method="json_mode")
+
+# ✅ Secure chat pipeline (prompt → JSON-mode LLM), composed once and reused by every call
+@lru_cache(maxsize=1)
+def get_secure_chain():
+    return get_prompt() | get_structured_llm()
+
+def _validate_chat_result(result):
+    """Validate the result structure and sanitize extracted data in place"""
+    if not hasattr(result, 'message'):
+        raise SecurityViolationError("Invalid response structure")
+    
+    # Additional security validation on the response, applied in place -
+    # the result is already a validated ChatResponse, so no dump/rebuild round-trip
+    if result.personalInfo:
+        result.personalInfo = validate_personal_info(result.personalInfo)
+    
+    if result.financialInfo:
+        result.financialInfo = validate_financial_data(result.financialInfo)
+    
+    return result
+
+def _chat_fallback(event_type: str, error: Exception, user_id: str = None, message: str = None) -> ChatResponse:
+    """Log the failure and return a safe fallback response"""
+    log_security_event(event_type, str(error), user_id)
+    return ChatResponse(**create_safe_fallback_response(message))
+
+_TECHNICAL_DIFFICULTIES = "I apologize, but I'm experiencing technical difficulties. Please try again in a moment."
 
 # ✅ Secure chat function
 def secure_chat_invoke(input_text: str, history=None, user_id: str = None):
@@ -80,50 +129,61 @@ def secure_chat_invoke(input_text: str, history=None, user_id: str = None):
         # Sanitize input using security module
         clean_input = sanitize_string(input_text, MAX_INPUT_LENGTH)
         
-        # Prepare the chain
-        chain = prompt | llm | parser
-        
-        # Invoke with sanitized input
-        result = chain.invoke({
+        # Invoke with sanitized input and token-bounded history
+        result = get_secure_chain().invoke({
             "input": clean_input,
-            "history": history or []
+            "history": trim_history(history)
         })
         
-        # Validate the result structure
-        if not hasattr(result, 'message'):
-            raise SecurityViolationError("Invalid response structure")
+        return _validate_chat_result(result)
         
-        # Convert to dict for additional validation
-        result_dict = result.model_dump() if hasattr(result, 'model_dump') else result.dict()
+    except SecurityViolationError as e:
+        return _chat_fallback("chat_security_violation", e, user_id)
         
-        # Additional security validation on the response
-        if result_dict.get('personalInfo'):
-            from chatbot.langchain.security import validate_personal_info
-            result_dict['personalInfo'] = validate_personal_info(result_dict['personalInfo'])
+    except Exception as e:
+        return _chat_fallback("chat_error", e, user_id, _TECHNICAL_DIFFICULTIES)
+
+async def secure_chat_ainvoke(input_text: str, history=None, user_id: str = None):
+    """Async version of secure_chat_invoke"""
+    try:
+        clean_input = sanitize_string(input_text, MAX_INPUT_LENGTH)
         
-        if result_dict.get('financialInfo'):
-            from chatbot.langchain.security import validate_financial_data
-            result_dict['financialInfo'] = validate_financial_data(result_dict['financialInfo'])
+        result = await get_secure_chain().ainvoke({
+            "input": clean_input,
+            "history": trim_history(history)
+        })
         
-        return ChatResponse(**result_dict)
+        return _validate_chat_result(result)
         
     except SecurityViolationError as e:
-        # Log security violation
-        log_security_event("chat_security_violation", str(e), user_id)
-        
-        # Return safe fallback response
-        fallback_dict = create_safe_fallback_response()
-        return ChatResponse(**fallback_dict)
+        return _chat_fallback("chat_security_violation", e, user_id)
         
     except Exception as e:
-        # Log error
-        log_security_event("chat_error", str(e), user_id)
-        
-        # Return safe fallback response
-        fallback_dict = create_safe_fallback_response(
-            "I apologize, but I'm experiencing technical difficulties. Please try again in a moment."
-        )
-        return ChatResponse(**fallback_dict)
-
-# ✅ Final runnable pipeline (prompt → LLM → structured parser) - keeping for backward compatibility
-chat_chain: RunnableSequence = prompt | llm | parser
+        return _chat_fallback("chat_error", e, user_id, _TECHNICAL_DIFFICULTIES)
+
+# ✅ Final runnable pipeline (history trim → prompt → LLM → structured parser) - keeping for backward compatibility
+@lru_cache(maxsize=1)
+def get_chat_chain():
+    from langchain_core.runnables import RunnablePassthrough
+    return (
+        RunnablePassthrough.assign(history=lambda x: trim_history(x.get("history")))
+        | get_prompt()
+        | get_llm()
+        | get_parser()
+    )
+
+# ✅ Module attributes kept for existing imports (`from chat_model import chat_chain`), built lazily
+_LAZY_ATTRIBUTES = {
+    "parser": get_parser,
+    "prompt": get_prompt,
+    "llm": get_llm,
+    "structured_llm": get_structured_llm,
+    "secure_chain": get_secure_chain,
+    "chat_chain": get_chat_chain,
+}
+
+def __getattr__(name):
+    factory = _LAZY_ATTRIBUTES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
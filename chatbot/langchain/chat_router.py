@@ -4,10 +4,8 @@ This saves tokens by only loading full user context when necessary
 """
 
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
 from typing import Literal
 
@@ -17,12 +15,16 @@ from chatbot.langchain.security import (
     SecurityViolationError,
     MAX_INPUT_LENGTH
 )
+from chatbot.langchain._http import shared_client_kwargs
 
 # Load environment
 load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY not found in .env")
+
+def _get_api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found in .env")
+    return api_key
 
 # Response schema for the router
 class RouterDecision(BaseModel):
@@ -30,20 +32,28 @@ class RouterDecision(BaseModel):
     message_type: Literal["general", "personal", "financial", "goal_setting"] = Field(description="Type of message")
     simple_response: str = Field(description="Simple response if no user data needed, or empty string if user data needed")
 
-# Router LLM (using cheaper/faster model)
-router_llm = ChatOpenAI(
-    model="gpt-3.5-turbo",  # Cheaper and faster for routing decisions
-    temperature=0.1,  # Low temperature for consistent routing
-    api_key=api_key,
-    max_tokens=200,  # Small token limit for routing
-    request_timeout=15,
-)
+# Router LLM (using cheaper/faster model), built on first use to keep imports cheap
+@lru_cache(maxsize=1)
+def get_router_llm():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model="gpt-3.5-turbo",  # Cheaper and faster for routing decisions
+        temperature=0.1,  # Low temperature for consistent routing
+        api_key=_get_api_key(),
+        max_tokens=200,  # Small token limit for routing
+        request_timeout=15,
+        model_kwargs={"response_format": {"type": "json_object"}},  # Guaranteed-valid JSON in one call
+        **shared_client_kwargs(),
+    )
 
 # Router parser
-router_parser = PydanticOutputParser(pydantic_object=RouterDecision)
+@lru_cache(maxsize=1)
+def get_router_parser():
+    from langchain.output_parsers import PydanticOutputParser
+    return PydanticOutputParser(pydantic_object=RouterDecision)
 
 # Router prompt
-router_prompt = ChatPromptTemplate.from_template("""
+ROUTER_TEMPLATE = """
 You are a routing assistant for a financial planning chatbot. Your job is to determine if a user's message requires their personal/financial data to answer properly.
 
 ROUTING RULES:
@@ -56,7 +66,51 @@ If needs_user_data is False, provide a helpful response in simple_response.
 If needs_user_data is True, leave simple_response empty.
 
 {format_instructions}
-""")
+"""
+
+@lru_cache(maxsize=1)
+def get_router_prompt():
+    from langchain.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_template(ROUTER_TEMPLATE)
+
+# Router chain with the (constant) format instructions bound once
+@lru_cache(maxsize=1)
+def get_router_chain():
+    router_parser = get_router_parser()
+    router_prompt = get_router_prompt().partial(
+        format_instructions=router_parser.get_format_instructions()
+    )
+    return router_prompt | get_router_llm() | router_parser
+
+# Module attributes kept for existing imports, built lazily
+_LAZY_ATTRIBUTES = {
+    "router_llm": get_router_llm,
+    "router_parser": get_router_parser,
+    "router_prompt": get_router_prompt,
+    "router_chain": get_router_chain,
+}
+
+def __getattr__(name):
+    factory = _LAZY_ATTRIBUTES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
+
+def _violation_decision() -> RouterDecision:
+    """Safe routing decision after a security violation"""
+    return RouterDecision(
+        needs_user_data=False,
+        message_type="general",
+        simple_response="I apologize, but I'm having trouble processing your request. Please try rephrasing your question about financial planning."
+    )
+
+def _error_decision() -> RouterDecision:
+    """Default to requiring user data to be safe"""
+    return RouterDecision(
+        needs_user_data=True,
+        message_type="general", 
+        simple_response=""
+    )
 
 def route_chat_message(input_text: str, user_id: str = None) -> RouterDecision:
     """
@@ -66,31 +120,31 @@ def route_chat_message(input_text: str, user_id: str = None) -> RouterDecision:
         # Sanitize input
         clean_input = sanitize_string(input_text, MAX_INPUT_LENGTH)
         
-        # Create the router chain
-        router_chain = router_prompt | router_llm | router_parser
-        
         # Get routing decision
-        decision = router_chain.invoke({
-            "input": clean_input,
-            "format_instructions": router_parser.get_format_instructions()
-        })
+        decision = get_router_chain().invoke({"input": clean_input})
         
         return decision
         
     except SecurityViolationError as e:
         log_security_event("router_security_violation", str(e), user_id)
-        # Return safe routing decision
-        return RouterDecision(
-            needs_user_data=False,
-            message_type="general",
-            simple_response="I apologize, but I'm having trouble processing your request. Please try rephrasing your question about financial planning."
-        )
+        return _violation_decision()
+        
+    except Exception as e:
+        log_security_event("router_error", str(e), user_id)
+        return _error_decision()
+
+async def route_chat_message_async(input_text: str, user_id: str = None) -> RouterDecision:
+    """
+    Async version of route_chat_message
+    """
+    try:
+        clean_input = sanitize_string(input_text, MAX_INPUT_LENGTH)
+        return await get_router_chain().ainvoke({"input": clean_input})
+        
+    except SecurityViolationError as e:
+        log_security_event("router_security_violation", str(e), user_id)
+        return _violation_decision()
         
     except Exception as e:
         log_security_event("router_error", str(e), user_id)
-        # Default to requiring user data to be safe
-        return RouterDecision(
-            needs_user_data=True,
-            message_type="general", 
-            simple_response=""
-        ) 
\ No newline at end of file
+        return _error_decision()
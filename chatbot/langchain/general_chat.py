@@ -4,9 +4,8 @@ Used when router determines no personal data is needed
 """
 
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from pydantic import BaseModel, Field
 
 from chatbot.langchain.security import (
@@ -15,29 +14,54 @@ from chatbot.langchain.security import (
     SecurityViolationError,
     MAX_INPUT_LENGTH
 )
+from chatbot.langchain.history import trim_history
+from chatbot.langchain._http import shared_client_kwargs
 
 # Load environment
 load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("OPENAI_API_KEY not found in .env")
+
+def _get_api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found in .env")
+    return api_key
 
 # Simple response schema for general advice
 class GeneralChatResponse(BaseModel):
     message: str = Field(description="General financial advice response")
 
-# General advice LLM
-general_llm = ChatOpenAI(
-    model="gpt-3.5-turbo",  # Cheaper model for general advice
-    temperature=0.7,
-    api_key=api_key,
-    max_tokens=500,  # Moderate limit for general responses
-    request_timeout=20,
-)
+# General advice LLM, built on first use to keep imports cheap
+@lru_cache(maxsize=1)
+def get_general_llm():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model="gpt-3.5-turbo",  # Cheaper model for general advice
+        temperature=0.7,
+        api_key=_get_api_key(),
+        max_tokens=500,  # Moderate limit for general responses
+        request_timeout=20,
+        **shared_client_kwargs(),
+    )
+
+# Semantic cache for context-free questions ("what is a Roth IRA?" asked many ways).
+# Questions are embedded locally (fastembed's ONNX bge-small, a few ms on CPU), so a
+# miss never adds an API round-trip before the LLM call; without fastembed the cache
+# serves exact (normalized) repeats only
+@lru_cache(maxsize=1)
+def get_general_cache():
+    from chatbot.langchain.semantic_cache import SemanticCache
+    try:
+        import fastembed  # noqa: F401
+    except ImportError:
+        return SemanticCache(None)
+    from langchain_community.embeddings import FastEmbedEmbeddings
+    return SemanticCache(
+        FastEmbedEmbeddings(model_name="BAAI/bge-small-en-v1.5"),
+        threshold=0.92,
+    )
 
 # General advice prompt
-general_prompt = ChatPromptTemplate.from_messages([
-    ("system", """
+GENERAL_SYSTEM_MESSAGE = """
 You are a helpful financial advisor providing general financial education and advice. 
 
 GUIDELINES:
@@ -58,10 +82,74 @@ TOPICS YOU CAN HELP WITH:
 - Financial terms and definitions
 
 Keep responses concise but informative.
-"""),
-    MessagesPlaceholder(variable_name="history"),
-    ("human", "{input}")
-])
+"""
+
+# Static system message (not a template) so the prefix is identical on every call
+@lru_cache(maxsize=1)
+def get_general_prompt():
+    from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+    from langchain_core.messages import SystemMessage
+    return ChatPromptTemplate.from_messages([
+        SystemMessage(content=GENERAL_SYSTEM_MESSAGE),
+        MessagesPlaceholder(variable_name="history"),
+        ("human", "{input}")
+    ])
+
+# General advice chain, composed once
+@lru_cache(maxsize=1)
+def get_general_chain():
+    return get_general_prompt() | get_general_llm()
+
+# Module attributes kept for existing imports, built lazily
+_LAZY_ATTRIBUTES = {
+    "general_llm": get_general_llm,
+    "general_cache": get_general_cache,
+    "general_prompt": get_general_prompt,
+    "general_chain": get_general_chain,
+}
+
+def __getattr__(name):
+    factory = _LAZY_ATTRIBUTES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
+
+def _extract_advice(response) -> str:
+    """Extract the message content and apply the length limit"""
+    # Extract content and validate
+    if hasattr(response, 'content'):
+        content = response.content
+    else:
+        content = str(response)
+    
+    # Basic validation
+    if len(content) > 1000:  # Reasonable limit for general advice
+        content = content[:1000] + "..."
+    
+    return content
+
+def _generate_general_advice(clean_input: str, history=None) -> str:
+    """
+    Call the general advice LLM and return the validated message content
+    """
+    response = get_general_chain().invoke({
+        "input": clean_input,
+        "history": trim_history(history, model="gpt-3.5-turbo")
+    })
+    return _extract_advice(response)
+
+async def _agenerate_general_advice(clean_input: str, history=None) -> str:
+    """
+    Async version of _generate_general_advice
+    """
+    response = await get_general_chain().ainvoke({
+        "input": clean_input,
+        "history": trim_history(history, model="gpt-3.5-turbo")
+    })
+    return _extract_advice(response)
+
+_VIOLATION_MESSAGE = "I apologize, but I'm having trouble processing your request. Please try rephrasing your question about financial planning."
+_ERROR_MESSAGE = "I'm experiencing technical difficulties. For general financial advice, I'd recommend starting with creating a budget and setting clear financial goals."
 
 def get_general_advice(input_text: str, history=None, user_id: str = None) -> GeneralChatResponse:
     """
@@ -71,35 +159,46 @@ def get_general_advice(input_text: str, history=None, user_id: str = None) -> Ge
         # Sanitize input
         clean_input = sanitize_string(input_text, MAX_INPUT_LENGTH)
         
-        # Create the chain
-        chain = general_prompt | general_llm
+        # Answers only depend on the question when there is no history, so those can be shared
+        if history:
+            content = _generate_general_advice(clean_input, history)
+        else:
+            content = get_general_cache().get_or_compute(
+                clean_input,
+                lambda: _generate_general_advice(clean_input)
+            )
         
-        # Get response
-        response = chain.invoke({
-            "input": clean_input,
-            "history": history or []
-        })
+        return GeneralChatResponse(message=content)
         
-        # Extract content and validate
-        if hasattr(response, 'content'):
-            content = response.content
-        else:
-            content = str(response)
+    except SecurityViolationError as e:
+        log_security_event("general_chat_security_violation", str(e), user_id)
+        return GeneralChatResponse(message=_VIOLATION_MESSAGE)
         
-        # Basic validation
-        if len(content) > 1000:  # Reasonable limit for general advice
-            content = content[:1000] + "..."
+    except Exception as e:
+        log_security_event("general_chat_error", str(e), user_id)
+        return GeneralChatResponse(message=_ERROR_MESSAGE)
+
+async def get_general_advice_async(input_text: str, history=None, user_id: str = None) -> GeneralChatResponse:
+    """
+    Async version of get_general_advice
+    """
+    try:
+        clean_input = sanitize_string(input_text, MAX_INPUT_LENGTH)
+        
+        if history:
+            content = await _agenerate_general_advice(clean_input, history)
+        else:
+            content = await get_general_cache().aget_or_compute(
+                clean_input,
+                lambda: _agenerate_general_advice(clean_input)
+            )
         
         return GeneralChatResponse(message=content)
         
     except SecurityViolationError as e:
         log_security_event("general_chat_security_violation", str(e), user_id)
-        return GeneralChatResponse(
-            message="I apologize, but I'm having trouble processing your request. Please try rephrasing your question about financial planning."
-        )
+        return GeneralChatResponse(message=_VIOLATION_MESSAGE)
         
     except Exception as e:
         log_security_event("general_chat_error", str(e), user_id)
-        return GeneralChatResponse(
-            message="I'm experiencing technical difficulties. For general financial advice, I'd recommend starting with creating a budget and setting clear financial goals."
-        ) 
\ No newline at end of file
+        return GeneralChatResponse(message=_ERROR_MESSAGE)
@@ -1,9 +1,16 @@
-from chatbot.langchain.model import llm
-from chatbot.langchain.parser import plan_parser, format_instructions
-from chatbot.prompts.generate_plan_prompt import get_generate_plan_prompt
-from langchain.schema import HumanMessage
+from chatbot.langchain.model import get_llm
+from chatbot.langchain.parser import parse_plan, format_instructions
+from chatbot.prompts.generate_plan_prompt import (
+    get_generate_plan_system_prompt,
+    get_generate_plan_user_prompt
+)
+from chatbot.langchain.plan_cache import plan_cache
+from chatbot.schemas.plan_schema import Plan, PlanStep, MAX_STEPS
+from langchain.schema import HumanMessage, SystemMessage
+from langchain_core.utils.json import parse_json_markdown
 from chatbot.langchain.security import (
     sanitize_dict,
+    build_sanitizer,
     sanitize_string, 
     log_security_event,
     SecurityViolationError,
@@ -11,45 +18,25 @@ from chatbot.langchain.security import (
 )
 
 import openai
+from typing import Iterator
 
-# Plan-specific security configurations
-MAX_STEPS = 10
-MAX_MILESTONES = 10
-MAX_PLAN_TITLE_LENGTH = 100
-MAX_STEP_DESCRIPTION_LENGTH = 500
-
+# Static instructions + format schema, built once. Sent first and byte-identical on
+# every call so the provider can reuse the cached prefix; only the profile/goal vary.
+PLAN_SYSTEM_MESSAGE = SystemMessage(content=get_generate_plan_system_prompt(format_instructions))
 
+# Content sanitizers specialized to the Plan schema, built once at import
+_SANITIZE_PLAN = build_sanitizer(Plan)
+_SANITIZE_STEP = build_sanitizer(PlanStep)
 
 def validate_plan_response(parsed_plan: dict) -> dict:
     """Validate and sanitize the generated plan response"""
     if not isinstance(parsed_plan, dict):
         raise SecurityViolationError("Plan response must be a dictionary")
     
-    # Use the centralized sanitization
-    sanitized_plan = sanitize_dict(parsed_plan)
-    
-    # Plan-specific validations
-    if 'steps' in sanitized_plan and isinstance(sanitized_plan['steps'], list):
-        if len(sanitized_plan['steps']) > MAX_STEPS:
-            raise SecurityViolationError(f"AI returned too many steps ({len(sanitized_plan['steps'])}). Limit is {MAX_STEPS}.")
-        
-        for i, step in enumerate(sanitized_plan['steps']):
-            if isinstance(step, dict) and 'description' in step:
-                desc = str(step['description'])
-                if len(desc) > MAX_STEP_DESCRIPTION_LENGTH:
-                    raise SecurityViolationError(f"Step {i+1} description too long")
-
-    # Validate milestones
-    if 'milestones' in sanitized_plan and isinstance(sanitized_plan['milestones'], list):
-        if len(sanitized_plan['milestones']) > MAX_MILESTONES:
-            raise SecurityViolationError(f"AI returned too many milestones ({len(sanitized_plan['milestones'])}). Limit is {MAX_MILESTONES}.")
-    
-    # Validate title length if present
-    if 'title' in sanitized_plan and isinstance(sanitized_plan['title'], str):
-        if len(sanitized_plan['title']) > MAX_PLAN_TITLE_LENGTH:
-            raise SecurityViolationError("Plan title too long")
-    
-    return sanitized_plan
+    # Step/milestone counts and title/description lengths are enforced by the
+    # plan schema during parsing, so only the content filtering remains here,
+    # walking the plan's known fields directly
+    return _SANITIZE_PLAN(parsed_plan)
 
 def create_fallback_plan() -> dict:
     """Create a safe fallback plan when errors occur"""
@@ -81,43 +68,63 @@ def create_fallback_plan() -> dict:
         ]
     }
 
+def _prepare_plan_request(user_profile: dict, goal_data: dict):
+    """Sanitize inputs and return (cache_key, cached_plan, message)"""
+    # Validate and sanitize inputs using centralized security
+    validated_profile = sanitize_dict(user_profile, MAX_INPUT_LENGTH)
+    validated_goal = sanitize_dict(goal_data, MAX_INPUT_LENGTH)
+    
+    # Identical submissions are served from cache without calling the LLM
+    cache_key = plan_cache.make_key(validated_profile, validated_goal)
+    cached_plan = plan_cache.get(cache_key)
+    if cached_plan is not None:
+        return cache_key, cached_plan, None
+    
+    # Generate the per-request prompt with validated data
+    prompt = get_generate_plan_user_prompt(validated_profile, validated_goal)
+    
+    # Validate prompt length
+    if len(prompt) > MAX_INPUT_LENGTH * 2:
+        raise SecurityViolationError("Generated prompt too large")
+    
+    return cache_key, None, HumanMessage(content=prompt)
+
+def _finish_plan(content: str, cache_key: str) -> dict:
+    """Parse, validate and cache the complete LLM output"""
+    if not content:
+        raise SecurityViolationError("Empty or invalid response from LLM")
+    
+    # Parse into a plain dict (msgspec fast path, Pydantic fallback)
+    plan_dict = parse_plan(content)
+    
+    # Final security validation
+    sanitized_plan = validate_plan_response(plan_dict)
+    
+    # Only successfully generated plans are cached (never the fallback)
+    plan_cache.set(cache_key, sanitized_plan)
+    
+    return sanitized_plan
+
 def generate_plan(user_profile: dict, goal_data: dict, user_id: str = None) -> dict:
     """Generate a financial plan with comprehensive security validations"""
     try:
-        # Validate and sanitize inputs using centralized security
-        validated_profile = sanitize_dict(user_profile, MAX_INPUT_LENGTH)
-        validated_goal = sanitize_dict(goal_data, MAX_INPUT_LENGTH)
-        
-        # Generate the prompt with validated data
-        prompt = get_generate_plan_prompt(validated_profile, validated_goal, format_instructions)
-        
-        # Validate prompt length
-        if len(prompt) > MAX_INPUT_LENGTH * 2:
-            raise SecurityViolationError("Generated prompt too large")
-        
-        message = HumanMessage(content=prompt)
+        cache_key, cached_plan, message = _prepare_plan_request(user_profile, goal_data)
+        if cached_plan is not None:
+            return cached_plan
 
         # Call the LLM with timeout protection
         try:
-            response = llm.invoke([message])
+            response = get_llm().invoke([PLAN_SYSTEM_MESSAGE, message])
         except openai.OpenAIError as e:
             raise RuntimeError(f"OpenAI call failed: {e}")
         except Exception as e:
             raise RuntimeError(f"LLM invocation failed: {e}")
         
         # Parse the response
-        if not response or not hasattr(response, 'content') or not response.content:
+        if not response or not hasattr(response, 'content'):
             raise SecurityViolationError("Empty or invalid response from LLM")
         
-        parsed = plan_parser.parse(response.content)
-        
-        # Convert to dict and sanitize
-        plan_dict = parsed.model_dump() if hasattr(parsed, 'model_dump') else parsed.dict()
-        
-        # Final security validation
-        sanitized_plan = validate_plan_response(plan_dict)
-        
-        return sanitized_plan
+        return _finish_plan(response.content, cache_key)
         
     except SecurityViolationError as e:
         # Log security violation
@@ -131,3 +138,62 @@ def generate_plan(user_profile: dict, goal_data: dict, user_id: str = None) -> d
         
         # Return a safe fallback plan
         return create_fallback_plan()
+
+def _completed_steps(content: str) -> list:
+    """Steps that are fully generated so far (the last one may still be streaming)"""
+    try:
+        partial = parse_json_markdown(content)
+    except Exception:
+        return []
+    steps = partial.get('steps') if isinstance(partial, dict) else None
+    if not isinstance(steps, list):
+        return []
+    return steps[:-1]
+
+def generate_plan_stream(user_profile: dict, goal_data: dict, user_id: str = None) -> Iterator[dict]:
+    """
+    Stream a financial plan: yields {"type": "step", "step": ...} for each step as soon as
+    it is complete and sanitized, then {"type": "plan", "plan": ...} with the full plan.
+    The plan event is authoritative - it goes through the same validation, caching and
+    fallback as generate_plan, so it can differ from the streamed steps if validation fails.
+    """
+    emitted = 0
+    try:
+        cache_key, cached_plan, message = _prepare_plan_request(user_profile, goal_data)
+        if cached_plan is not None:
+            for step in cached_plan.get('steps', []):
+                yield {"type": "step", "step": step}
+            yield {"type": "plan", "plan": cached_plan}
+            return
+        
+        chunks = []
+        try:
+            for chunk in get_llm().stream([PLAN_SYSTEM_MESSAGE, message]):
+                chunks.append(chunk.content)
+                # A step can only complete on a closing brace, so skip re-parsing otherwise
+                if '}' not in chunk.content or emitted >= MAX_STEPS:
+                    continue
+                steps = _completed_steps("".join(chunks))
+                for step in steps[emitted:MAX_STEPS]:
+                    yield {"type": "step", "step": _SANITIZE_STEP(step)}
+                emitted = max(emitted, min(len(steps), MAX_STEPS))
+        except SecurityViolationError:
+            raise
+        except openai.OpenAIError as e:
+            raise RuntimeError(f"OpenAI call failed: {e}")
+        except Exception as e:
+            raise RuntimeError(f"LLM invocation failed: {e}")
+        
+        plan = _finish_plan("".join(chunks), cache_key)
+        # The last step is only known to be complete once the whole plan has parsed
+        for step in plan.get('steps', [])[emitted:]:
+            yield {"type": "step", "step": step}
+        yield {"type": "plan", "plan": plan}
+        
+    except SecurityViolationError as e:
+        log_security_event("plan_security_violation", str(e), user_id)
+        raise e
+        
+    except Exception as e:
+        log_security_event("plan_generation_error", str(e), user_id)
+        yield {"type": "plan", "plan": create_fallback_plan()}
@@ -0,0 +1,69 @@
+"""
+Chat History Helpers - Keep prompt history inside a fixed token budget
+Prompt size stays bounded no matter how long a conversation runs
+"""
+
+import logging
+from functools import lru_cache
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Token budget for prior turns sent with each prompt
+MAX_HISTORY_TOKENS = 1500
+
+# Approximate per-message framing overhead in the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Rough tokens-per-character ratio for English text, used when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """tiktoken encoding for model, or None if it can't be loaded (missing package, no network)"""
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # A token budget must never break the request - fall back to an estimate
+        logger.warning("tiktoken unavailable, estimating history tokens: %s", e)
+        return None
+
+def _count_tokens(encoding, text: str) -> int:
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN
+    return len(encoding.encode(text))
+
+def _message_text(message: Any) -> str:
+    """Extract text from a LangChain message, (role, content) tuple or dict"""
+    if isinstance(message, tuple):
+        content = message[1]
+    elif isinstance(message, dict):
+        content = message.get("content", "")
+    else:
+        content = getattr(message, "content", message)
+    return content if isinstance(content, str) else str(content)
+
+def trim_history(
+    history: Optional[List[Any]],
+    max_tokens: int = MAX_HISTORY_TOKENS,
+    model: str = "gpt-4"
+) -> List[Any]:
+    """Keep the most recent messages that fit within max_tokens"""
+    if not history:
+        return []
+
+    encoding = _get_encoding(model)
+    kept = []
+    total = 0
+    for message in reversed(history):
+        total += _count_tokens(encoding, _message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+        if total > max_tokens:
+            break
+        kept.append(message)
+
+    kept.reverse()
+    return kept
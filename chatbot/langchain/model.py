@@ -1,13 +1,27 @@
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
 import os
+from functools import cache
+from dotenv import load_dotenv
+
+from chatbot.langchain._http import shared_client_kwargs
 
 load_dotenv()
 
-llm = ChatOpenAI(
-    model="gpt-4",
-    temperature=0.7,
-    api_key=os.getenv("OPENAI_API_KEY"),
-    max_tokens=1000,         
-    timeout=60               
-)
+# Plan-generation model. One client per (timeout, temperature), built on first use so
+# importing this module stays cheap; it reuses the shared HTTP/2 connection pools.
+@cache
+def get_llm(*, timeout: int = 60, temperature: float = 0.7):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model="gpt-4",
+        temperature=temperature,
+        api_key=os.getenv("OPENAI_API_KEY"),
+        max_tokens=1000,
+        timeout=timeout,
+        **shared_client_kwargs(),
+    )
+
+# `from chatbot.langchain.model import llm` still works, built lazily with the defaults
+def __getattr__(name):
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,25 @@
+import msgspec
 from langchain.output_parsers import PydanticOutputParser
 from chatbot.schemas.plan_schema import Plan
+from chatbot.schemas.plan_schema_fast import PlanStruct
 
 plan_parser = PydanticOutputParser(pydantic_object=Plan)
 format_instructions = plan_parser.get_format_instructions()
+
+# C-level decoder for the hot path; strict=False allows the same lax coercions
+# (e.g. "5" -> 5) that Pydantic applies
+plan_decoder = msgspec.json.Decoder(PlanStruct, strict=False)
+
+def _strip_code_fence(content: str) -> str:
+    text = content.strip()
+    text = text.removeprefix("```json").removeprefix("```").removesuffix("```")
+    return text.strip()
+
+def parse_plan(content: str) -> dict:
+    """Parse the LLM's plan JSON into a plain dict, falling back to Pydantic on decode errors"""
+    try:
+        # C-level Struct -> dict conversion, no Python field walk
+        return msgspec.to_builtins(plan_decoder.decode(_strip_code_fence(content)))
+    except msgspec.DecodeError:
+        # None fields are kept so both paths return the same keys as the schema
+        return plan_parser.parse(content).model_dump(mode="python", warnings=False)
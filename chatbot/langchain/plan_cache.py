@@ -0,0 +1,53 @@
+"""
+Plan Cache - Exact-match cache for generated plans
+Identical profile + goal submissions (retries, duplicate clicks) skip the GPT-4 call
+"""
+
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from chatbot.langchain import _json
+
+PLAN_CACHE_SIZE = 512
+
+class PlanCache:
+    """
+    Thread-safe LRU of sanitized plans keyed on a hash of the validated inputs
+    """
+    def __init__(self, maxsize: int = PLAN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._plans: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(user_profile: Dict[str, Any], goal_data: Dict[str, Any]) -> str:
+        """Stable key for a (profile, goal) pair regardless of dict ordering"""
+        payload = _json.dumps_bytes({"p": user_profile, "g": goal_data}, sort_keys=True)
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                return None
+            self._plans.move_to_end(key)
+        # Callers get their own copy so cached plans can't be mutated
+        return copy.deepcopy(plan)
+
+    def set(self, key: str, plan: Dict[str, Any]) -> None:
+        plan = copy.deepcopy(plan)
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            if len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+
+# Shared process-wide plan cache
+plan_cache = PlanCache()
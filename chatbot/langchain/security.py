@@ -5,19 +5,81 @@ Provides comprehensive input validation, content filtering, and response sanitiz
 
 import re
 import json
-from typing import Any, Dict, List, Union
+import threading
+from functools import lru_cache
+import types
+from typing import Any, Callable, Dict, List, Literal, Optional, Union, get_args, get_origin
+import atexit
 import logging
+import os
+import queue
+
+from chatbot.langchain import _json
+
+# Optional: hyperscan scans every sensitive pattern in one linear DFA pass (x86-64 only)
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Security events are logged on every request. The request thread only enqueues the
+# entry; a background thread makes the (normal, propagating) logger call, so handlers
+# and formatting stay whatever the app configured. The thread is started on first use
+# and restarted in a forked child, which does not inherit it.
+_log_lock = threading.Lock()
+_log_queue = None
+_log_thread = None
+
+def _log_worker(entries: "queue.SimpleQueue") -> None:
+    while True:
+        entry = entries.get()
+        if entry is None:
+            return
+        logger.warning("Security Event: %s", entry)
+
+def _get_log_queue() -> "queue.SimpleQueue":
+    global _log_queue, _log_thread
+    if _log_queue is None:
+        with _log_lock:
+            if _log_queue is None:
+                entries = queue.SimpleQueue()
+                _log_thread = threading.Thread(
+                    target=_log_worker, args=(entries,), name="security-log", daemon=True
+                )
+                _log_thread.start()
+                _log_queue = entries
+    return _log_queue
+
+def _reset_log_worker() -> None:
+    """After fork: drop the parent's queue and lock so the child starts its own worker"""
+    global _log_lock, _log_queue, _log_thread
+    _log_lock = threading.Lock()
+    _log_queue = None
+    _log_thread = None
+
+def _stop_log_worker() -> None:
+    """Flush queued events at interpreter exit"""
+    if _log_queue is not None and _log_thread is not None:
+        _log_queue.put(None)
+        _log_thread.join(timeout=5)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_log_worker)
+atexit.register(_stop_log_worker)
+
 # Security Configuration
 MAX_INPUT_LENGTH = 2000
 MAX_OUTPUT_LENGTH = 1500
 MAX_JSON_SIZE = 10000
 MAX_ARRAY_LENGTH = 50
 MAX_STRING_LENGTH = 1000
+MAX_TOKENS = 1000  # Completion token cap for chat models
+SANITIZE_CACHE_SIZE = 4096
+SANITIZE_CACHE_MAX_LENGTH = 256
 
 # Content filtering patterns
 SENSITIVE_PATTERNS = [
@@ -34,6 +96,12 @@ SENSITIVE_PATTERNS = [
     r'\b(?:127\.0\.0\.1|0\.0\.0\.0)\b',  # Local IPs
 ]
 
+# All sensitive patterns compiled once into a single alternation (one scan per string)
+_SENSITIVE_RE = re.compile(
+    "|".join(f"(?:{pattern})" for pattern in SENSITIVE_PATTERNS),
+    re.IGNORECASE
+)
+
 # Banned words/phrases that should never appear in responses
 BANNED_PHRASES = [
     'internal error',
@@ -48,88 +116,287 @@ BANNED_PHRASES = [
     'database error',
 ]
 
+# Banned phrases compiled into one case-insensitive pattern (no lowercased copies of the text)
+_BANNED_RE = re.compile(
+    "|".join(re.escape(phrase) for phrase in BANNED_PHRASES),
+    re.IGNORECASE
+)
+
+def _compile_content_db():
+    """
+    Compile the sensitive patterns and banned phrases into one hyperscan database,
+    or None to use _SENSITIVE_RE/_BANNED_RE. Ids below len(SENSITIVE_PATTERNS) are
+    sensitive patterns; the rest index BANNED_PHRASES.
+    """
+    if hyperscan is None:
+        return None
+    expressions = SENSITIVE_PATTERNS + [re.escape(phrase) for phrase in BANNED_PHRASES]
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[expression.encode() for expression in expressions],
+            ids=list(range(len(expressions))),
+            elements=len(expressions),
+            # \b and caseless matching are ASCII-only here (hyperscan rejects \b under UCP),
+            # so _check_content only sends ASCII text through this database
+            flags=[
+                hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8
+            ] * len(expressions)
+        )
+        return db
+    except Exception as e:
+        logger.warning("hyperscan unavailable, falling back to re: %s", e)
+        return None
+
+_CONTENT_DB = _compile_content_db()
+
+# Hyperscan scratch space is not thread-safe, so each thread gets its own
+_scratch = threading.local()
+
+def _on_content_match(match_id: int, _start: int, _end: int, _flags: int, hits: List[int]) -> bool:
+    hits.append(match_id)
+    # Sensitive matches win outright, so stop there; keep scanning after a banned phrase
+    return match_id < len(SENSITIVE_PATTERNS)
+
 class SecurityViolationError(Exception):
     """Raised when a security violation is detected"""
     pass
 
+def _check_content(text: str, label: str) -> None:
+    """Raise if text contains sensitive patterns or banned phrases"""
+    # re.IGNORECASE folds non-ASCII letters (e.g. "ſ" matches "s") and hyperscan does
+    # not, so anything non-ASCII takes the re path to keep both paths equivalent
+    if _CONTENT_DB is None or not text.isascii():
+        if _SENSITIVE_RE.search(text):
+            raise SecurityViolationError(f"{label} contains potentially sensitive information")
+        
+        match = _BANNED_RE.search(text)
+        if match:
+            raise SecurityViolationError(f"{label} contains banned phrase: {match.group(0).lower()}")
+        return
+    
+    scratch = getattr(_scratch, "scratch", None)
+    if scratch is None:
+        scratch = _scratch.scratch = hyperscan.Scratch(_CONTENT_DB)
+    
+    # One pass covers both lists; a sensitive match terminates the scan early
+    hits: List[int] = []
+    try:
+        _CONTENT_DB.scan(
+            text.encode("utf-8", "replace"),
+            match_event_handler=_on_content_match,
+            context=hits,
+            scratch=scratch
+        )
+    except hyperscan.ScanTerminated:
+        raise SecurityViolationError(f"{label} contains potentially sensitive information")
+    
+    if hits:
+        phrase = BANNED_PHRASES[hits[0] - len(SENSITIVE_PATTERNS)]
+        raise SecurityViolationError(f"{label} contains banned phrase: {phrase}")
+
 def sanitize_string(text: str, max_length: int = MAX_STRING_LENGTH) -> str:
     """Sanitize and validate a string input"""
     if not isinstance(text, str):
         raise SecurityViolationError("Input must be a string")
     
+    # Short values (names, categories, enum-like fields) recur on every request,
+    # so their scan results are memoized; long free text is unlikely to repeat
+    if len(text) <= SANITIZE_CACHE_MAX_LENGTH:
+        return _sanitize_string_cached(text, max_length)
+    return _sanitize_string(text, max_length)
+
+def _sanitize_string(text: str, max_length: int) -> str:
+    """Uncached sanitization body - pure, depends only on module-level patterns"""
     if len(text) > max_length:
         raise SecurityViolationError(f"String too long. Maximum {max_length} characters allowed")
     
-    # Check for sensitive patterns
-    for pattern in SENSITIVE_PATTERNS:
-        if re.search(pattern, text, re.IGNORECASE):
-            raise SecurityViolationError("String contains potentially sensitive information")
-    
-    # Check for banned phrases
-    for phrase in BANNED_PHRASES:
-        if phrase.lower() in text.lower():
-            raise SecurityViolationError(f"String contains banned phrase: {phrase}")
+    # Check for sensitive patterns and banned phrases
+    _check_content(text, "String")
     
     return text.strip()
 
-def sanitize_dict(data: Dict[str, Any], max_size: int = MAX_JSON_SIZE) -> Dict[str, Any]:
-    """Recursively sanitize a dictionary"""
+# Violations raise, and exceptions are never cached, so only clean strings are memoized
+_sanitize_string_cached = lru_cache(maxsize=SANITIZE_CACHE_SIZE)(_sanitize_string)
+
+def sanitize_dict(data: Dict[str, Any], max_size: Optional[int] = MAX_JSON_SIZE) -> Dict[str, Any]:
+    """Recursively sanitize a dictionary (max_size=None skips the size check for schema-bounded data)"""
     if not isinstance(data, dict):
         raise SecurityViolationError("Input must be a dictionary")
     
-    # Check overall size
-    data_str = json.dumps(data, default=str)
-    if len(data_str) > max_size:
-        raise SecurityViolationError(f"Dictionary too large. Maximum {max_size} characters allowed")
-    
-    sanitized = {}
-    for key, value in data.items():
-        # Sanitize the key
-        clean_key = sanitize_string(str(key), 100)
-        
-        # Sanitize the value based on its type
-        if isinstance(value, str):
-            clean_value = sanitize_string(value)
-        elif isinstance(value, dict):
-            clean_value = sanitize_dict(value, max_size // 2)
-        elif isinstance(value, list):
-            clean_value = sanitize_list(value)
-        elif isinstance(value, (int, float, bool)):
-            clean_value = value
-        elif value is None:
-            clean_value = None
-        else:
-            # Convert to string and sanitize
-            clean_value = sanitize_string(str(value))
-        
-        sanitized[clean_key] = clean_value
+    # Check overall size once - nested values are part of this measurement,
+    # so they are not re-serialized at every level
+    if max_size is not None:
+        # (measured in UTF-8 bytes of compact JSON - no decode needed)
+        try:
+            size = len(_json.dumps_bytes(data))
+        except (RecursionError, ValueError):
+            # Too deep for the (recursive) stdlib encoder, or circular - measure with
+            # an explicit stack, which also stops as soon as the limit is passed
+            size = _json_size(data, max_size)
+        if size > max_size:
+            raise SecurityViolationError(f"Dictionary too large. Maximum {max_size} characters allowed")
     
-    return sanitized
+    return _walk(data, {})
 
 def sanitize_list(data: List[Any]) -> List[Any]:
     """Sanitize a list and its contents"""
     if not isinstance(data, list):
         raise SecurityViolationError("Input must be a list")
     
-    if len(data) > MAX_ARRAY_LENGTH:
-        raise SecurityViolationError(f"List too long. Maximum {MAX_ARRAY_LENGTH} items allowed")
-    
-    sanitized = []
-    for item in data:
-        if isinstance(item, str):
-            sanitized.append(sanitize_string(item))
-        elif isinstance(item, dict):
-            sanitized.append(sanitize_dict(item))
-        elif isinstance(item, list):
-            sanitized.append(sanitize_list(item))
-        elif isinstance(item, (int, float, bool)):
-            sanitized.append(item)
-        elif item is None:
-            sanitized.append(None)
+    return _walk(data, [])
+
+def _json_size(data: Any, limit: int) -> int:
+    """Compact JSON size of data in UTF-8 bytes, counted iteratively; stops once past limit"""
+    size = 0
+    stack = [data]
+    while stack and size <= limit:
+        value = stack.pop()
+        if isinstance(value, dict):
+            # Braces, plus a colon per entry and a comma between entries
+            size += 2 * len(value) + 1 if value else 2
+            for key, item in value.items():
+                if not isinstance(key, str):
+                    key = json.dumps(key) if key is None or isinstance(key, (bool, int, float)) else str(key)
+                size += len(json.dumps(key, ensure_ascii=False).encode())
+                stack.append(item)
+        elif isinstance(value, (list, tuple)):
+            # Brackets, plus a comma between items
+            size += len(value) + 1 if value else 2
+            stack.extend(value)
+        else:
+            size += len(json.dumps(value, default=str, ensure_ascii=False).encode())
+    return size
+
+def _passthrough(value: Any) -> Any:
+    return value
+
+# Exact-type dispatch for leaf values: one type() + dict lookup instead of an isinstance ladder
+_LEAF_HANDLERS: Dict[type, Callable[[Any], Any]] = {
+    str: sanitize_string,
+    int: _passthrough,
+    float: _passthrough,
+    bool: _passthrough,
+    type(None): _passthrough,
+}
+
+def _sanitize_value(value: Any, stack: List[tuple]) -> Any:
+    """Sanitize a leaf, or return an empty container and queue it for filling"""
+    handler = _LEAF_HANDLERS.get(type(value))
+    if handler is not None:
+        return handler(value)
+    
+    # Subclasses and other types - rare, so the isinstance checks live off the fast path
+    if isinstance(value, dict):
+        clean = {}
+    elif isinstance(value, list):
+        clean = []
+    elif isinstance(value, str):
+        return sanitize_string(value)
+    elif isinstance(value, (int, float)):
+        return value
+    else:
+        # Convert to string and sanitize
+        return sanitize_string(str(value))
+    
+    stack.append((value, clean))
+    return clean
+
+def _walk(root: Union[Dict[str, Any], List[Any]], out: Union[Dict[str, Any], List[Any]]):
+    """Sanitize a nested dict/list with an explicit stack (no recursion limit)"""
+    stack = [(root, out)]
+    while stack:
+        source, target = stack.pop()
+        if isinstance(target, dict):
+            for key, value in source.items():
+                # Sanitize the key, then the value based on its type
+                target[sanitize_string(str(key), 100)] = _sanitize_value(value, stack)
         else:
-            sanitized.append(sanitize_string(str(item)))
+            if len(source) > MAX_ARRAY_LENGTH:
+                raise SecurityViolationError(f"List too long. Maximum {MAX_ARRAY_LENGTH} items allowed")
+            for item in source:
+                target.append(_sanitize_value(item, stack))
+    
+    return out
+
+def _sanitize_any(value: Any) -> Any:
+    """Generic sanitization for a value of unknown shape"""
+    if isinstance(value, dict):
+        return _walk(value, {})
+    if isinstance(value, list):
+        return _walk(value, [])
+    return _sanitize_value(value, [])
+
+_NUMERIC_TYPES = frozenset((int, float, bool))
+
+# Leaf types a Literal can hold - all hashable, so membership tests are safe
+_LITERAL_VALUE_TYPES = frozenset((str, int, float, bool, type(None)))
+
+# `X | None` annotations (Python 3.10+)
+UnionType = getattr(types, "UnionType", Union)
+
+def _field_sanitizer(annotation: Any) -> Callable[[Any], Any]:
+    """Resolve a field annotation to the sanitizer for its values (once, at build time)"""
+    origin = get_origin(annotation)
     
-    return sanitized
+    if origin in (Union, UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        inner = _field_sanitizer(args[0]) if len(args) == 1 else _sanitize_any
+        return lambda value: None if value is None else inner(value)
+    
+    if origin is Literal:
+        # Schema-validated values are one of the fixed literals - nothing to scan
+        # (anything else, including unhashable values, goes through the generic walk)
+        allowed = frozenset(get_args(annotation))
+        return lambda value: (
+            value if type(value) in _LITERAL_VALUE_TYPES and value in allowed
+            else _sanitize_any(value)
+        )
+    
+    if origin is list:
+        args = get_args(annotation)
+        item = _field_sanitizer(args[0]) if args else _sanitize_any
+        
+        def sanitize_items(value):
+            if type(value) is not list:
+                return _sanitize_any(value)
+            if len(value) > MAX_ARRAY_LENGTH:
+                raise SecurityViolationError(f"List too long. Maximum {MAX_ARRAY_LENGTH} items allowed")
+            return [item(entry) for entry in value]
+        
+        return sanitize_items
+    
+    if annotation is str:
+        return lambda value: sanitize_string(value) if type(value) is str else _sanitize_any(value)
+    
+    if annotation in (int, float, bool):
+        return lambda value: value if type(value) in _NUMERIC_TYPES else _sanitize_any(value)
+    
+    if hasattr(annotation, "model_fields"):
+        return build_sanitizer(annotation)
+    
+    return _sanitize_any
+
+def build_sanitizer(model_cls: type) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Build a sanitizer specialized to a Pydantic model's fields
+
+    Field names and value types are resolved once here, so the returned function skips
+    key sanitization and per-value type dispatch. Values that don't match the declared
+    shape (including dicts with unexpected keys) go through the generic walk instead.
+    """
+    fields = [
+        (name, _field_sanitizer(field.annotation))
+        for name, field in model_cls.model_fields.items()
+    ]
+    names = frozenset(name for name, _ in fields)
+    
+    def sanitize(data: Dict[str, Any]) -> Dict[str, Any]:
+        if type(data) is not dict or data.keys() != names:
+            return _sanitize_any(data)
+        return {name: sanitize_field(data[name]) for name, sanitize_field in fields}
+    
+    return sanitize
 
 def validate_json_response(response: str) -> Dict[str, Any]:
     """Validate and parse a JSON response"""
@@ -139,19 +406,12 @@ def validate_json_response(response: str) -> Dict[str, Any]:
     if len(response) > MAX_OUTPUT_LENGTH:
         raise SecurityViolationError("Response too long")
     
-    # Check for sensitive patterns
-    for pattern in SENSITIVE_PATTERNS:
-        if re.search(pattern, response, re.IGNORECASE):
-            raise SecurityViolationError("Response contains potentially sensitive information")
-    
-    # Check for banned phrases
-    for phrase in BANNED_PHRASES:
-        if phrase.lower() in response.lower():
-            raise SecurityViolationError(f"Response contains banned phrase: {phrase}")
+    # Check for sensitive patterns and banned phrases
+    _check_content(response, "Response")
     
     # Ensure it's valid JSON
     try:
-        parsed = json.loads(response)
+        parsed = _json.loads(response)
     except json.JSONDecodeError as e:
         raise SecurityViolationError(f"Invalid JSON response: {e}")
     
@@ -175,6 +435,9 @@ def create_safe_fallback_response(message: str = None) -> Dict[str, Any]:
 
 def log_security_event(event_type: str, details: str, user_id: str = None):
     """Log security events for monitoring"""
+    if not logger.isEnabledFor(logging.WARNING):
+        return
+    
     log_entry = {
         "event_type": event_type,
         "details": details,
@@ -182,7 +445,8 @@ def log_security_event(event_type: str, details: str, user_id: str = None):
         "timestamp": "now"  # In production, use proper timestamp
     }
     
-    logger.warning(f"Security Event: {log_entry}")
+    # Formatting and handler I/O happen on the background thread
+    _get_log_queue().put(log_entry)
 
 def rate_limit_check(user_id: str, max_requests: int = 100) -> bool:
     """Simple rate limiting check (in production, use Redis or similar)"""
@@ -0,0 +1,153 @@
+"""
+Semantic Cache - Reuses responses for questions that mean the same thing
+Exact (normalized) matches are served first, then the closest earlier question by
+embedding cosine similarity, so repeated general questions skip the LLM entirely
+"""
+
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from chatbot.langchain.security import log_security_event
+
+# Sentinel for lookups, since None is a legitimate cached value
+_MISS = object()
+
+class SemanticCache:
+    """
+    Bounded in-process cache keyed on question meaning
+
+    `embeddings` is any LangChain embeddings object exposing `embed_query`, or None
+    for exact (normalized) matches only. Oldest entries are evicted first once
+    `max_entries` is reached.
+    """
+    def __init__(self, embeddings, threshold: float = 0.92, max_entries: int = 1000):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._exact: Dict[str, Any] = {}
+        # Ring buffer: slot i holds a key, its value and its embedding row. Rows are
+        # overwritten in place, so a store never copies the matrix.
+        self._keys: List[Optional[str]] = [None] * max_entries
+        self._values: List[Any] = [None] * max_entries
+        self._vectors = None  # (max_entries, dim) matrix of unit-length embeddings, allocated on first store
+        self._size = 0  # filled slots
+        self._next = 0  # slot the next store writes (the oldest entry once full)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    @staticmethod
+    def _unit(raw) -> "np.ndarray":
+        vector = np.asarray(raw, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _embed(self, text: str):
+        if self.embeddings is None:
+            return None
+        return self._unit(self.embeddings.embed_query(text))
+
+    async def _aembed(self, text: str):
+        if self.embeddings is None:
+            return None
+        return self._unit(await self.embeddings.aembed_query(text))
+
+    def _get_exact(self, key: str) -> Any:
+        with self._lock:
+            return self._exact.get(key, _MISS)
+
+    def _get_similar(self, vector) -> Any:
+        """Value of the closest cached question above the threshold, or _MISS"""
+        if vector is None:
+            return _MISS
+        with self._lock:
+            if self._vectors is not None and self._size:
+                scores = self._vectors[:self._size] @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    return self._values[best]
+        return _MISS
+
+    def get_or_compute(self, text: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for `text` (or a semantically equivalent question),
+        otherwise call `compute` and cache its result
+        """
+        key = self._normalize(text)
+        value = self._get_exact(key)
+        if value is not _MISS:
+            return value
+
+        # Embedding failures only disable the semantic lookup, never the request
+        try:
+            vector = self._embed(key)
+        except Exception as e:
+            log_security_event("semantic_cache_error", str(e))
+            vector = None
+
+        value = self._get_similar(vector)
+        if value is not _MISS:
+            return value
+
+        value = compute()
+        self._store(key, value, vector)
+        return value
+
+    async def aget_or_compute(self, text: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async version of get_or_compute; `compute` returns an awaitable
+        """
+        key = self._normalize(text)
+        value = self._get_exact(key)
+        if value is not _MISS:
+            return value
+
+        try:
+            vector = await self._aembed(key)
+        except Exception as e:
+            log_security_event("semantic_cache_error", str(e))
+            vector = None
+
+        value = self._get_similar(vector)
+        if value is not _MISS:
+            return value
+
+        value = await compute()
+        self._store(key, value, vector)
+        return value
+
+    def _store(self, key: str, value: Any, vector) -> None:
+        with self._lock:
+            if key in self._exact:
+                return
+
+            # Entries without an embedding keep a zero row, which never reaches the
+            # threshold, so they are only served as exact matches
+            if self._vectors is None and vector is not None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            slot = self._next
+            evicted = self._keys[slot]
+            if evicted is not None:
+                self._exact.pop(evicted, None)
+
+            self._exact[key] = value
+            self._keys[slot] = key
+            self._values[slot] = value
+            if self._vectors is not None:
+                self._vectors[slot] = 0 if vector is None else vector
+            self._next = (slot + 1) % self.max_entries
+            self._size = min(self._size + 1, self.max_entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._exact.clear()
+            self._keys = [None] * self.max_entries
+            self._values = [None] * self.max_entries
+            self._vectors = None
+            self._size = 0
+            self._next = 0
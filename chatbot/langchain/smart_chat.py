@@ -4,13 +4,28 @@ Smart Chat Orchestrator - Two-layer system to optimize token usage
 2. Routes to appropriate chat model
 """
 
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, List
-from chatbot.langchain.chat_router import route_chat_message, RouterDecision
-from chatbot.langchain.general_chat import get_general_advice, GeneralChatResponse
-from chatbot.langchain.chat_model import secure_chat_invoke
+from chatbot.langchain.chat_router import route_chat_message, route_chat_message_async, RouterDecision
+from chatbot.langchain.general_chat import get_general_advice, get_general_advice_async, GeneralChatResponse
+from chatbot.langchain.chat_model import secure_chat_invoke, secure_chat_ainvoke
 from chatbot.schemas.chat_response import ChatResponse
 from chatbot.langchain.security import log_security_event
 
+# Speculative execution: when a user profile is present, start the full chat call
+# alongside the router so personal messages cost max(t_router, t_full) instead of
+# t_router + t_full. Off by default - the full call's tokens are wasted whenever the
+# router picks the general path, so it only pays off when most messages are personal.
+SPECULATIVE_CHAT = os.getenv("SPECULATIVE", "false").strip().lower() in ("1", "true", "yes")
+SPECULATIVE_MAX_WORKERS = 8
+
+_speculative_executor = ThreadPoolExecutor(
+    max_workers=SPECULATIVE_MAX_WORKERS,
+    thread_name_prefix="speculative-chat"
+)
+
 class SmartChatResponse:
     """
     Unified response class that works with both general and full chat responses
@@ -22,6 +37,18 @@ class SmartChatResponse:
         self.goals = goals
         self.used_user_data = used_user_data  # Track which layer was used
 
+PROFILE_REQUEST_MESSAGE = "I'd be happy to provide personalized advice! To give you the best recommendations, could you share some details about your financial situation, goals, or what specific area you'd like help with?"
+SMART_CHAT_ERROR_MESSAGE = "I apologize, but I'm experiencing technical difficulties. Please try rephrasing your question about financial planning."
+
+def _from_full_response(full_response: ChatResponse) -> SmartChatResponse:
+    return SmartChatResponse(
+        message=full_response.message,
+        personalInfo=full_response.personalInfo,
+        financialInfo=full_response.financialInfo,
+        goals=full_response.goals,
+        used_user_data=True
+    )
+
 def smart_chat_invoke(
     input_text: str, 
     user_profile: Optional[Dict[str, Any]] = None,
@@ -44,12 +71,20 @@ def smart_chat_invoke(
         # LAYER 1: Route the message
         log_security_event("chat_routing_start", f"Message length: {len(input_text)}", user_id)
         
+        speculative_full = None
+        if SPECULATIVE_CHAT and user_profile:
+            speculative_full = _speculative_executor.submit(secure_chat_invoke, input_text, history, user_id)
+        
         routing_decision: RouterDecision = route_chat_message(input_text, user_id)
         
         # LAYER 2a: Handle general advice (no user data needed)
         if not routing_decision.needs_user_data:
             log_security_event("chat_using_general", f"Message type: {routing_decision.message_type}", user_id)
             
+            # Discard the speculative full response (an in-flight request is bounded by its timeout)
+            if speculative_full is not None:
+                speculative_full.cancel()
+            
             # Use router's simple response if provided, otherwise get detailed general advice
             if routing_decision.simple_response and len(routing_decision.simple_response.strip()) > 10:
                 return SmartChatResponse(
@@ -70,30 +105,74 @@ def smart_chat_invoke(
             
             # Check if user profile is available
             if not user_profile:
-                return SmartChatResponse(
-                    message="I'd be happy to provide personalized advice! To give you the best recommendations, could you share some details about your financial situation, goals, or what specific area you'd like help with?",
-                    used_user_data=False
-                )
+                return SmartChatResponse(message=PROFILE_REQUEST_MESSAGE, used_user_data=False)
             
             # Use full chat model with user data
-            full_response: ChatResponse = secure_chat_invoke(input_text, history, user_id)
+            if speculative_full is not None:
+                full_response: ChatResponse = speculative_full.result()
+            else:
+                full_response = secure_chat_invoke(input_text, history, user_id)
             
-            return SmartChatResponse(
-                message=full_response.message,
-                personalInfo=full_response.personalInfo,
-                financialInfo=full_response.financialInfo,
-                goals=full_response.goals,
-                used_user_data=True
-            )
+            return _from_full_response(full_response)
             
     except Exception as e:
         log_security_event("smart_chat_error", str(e), user_id)
         
         # Safe fallback
-        return SmartChatResponse(
-            message="I apologize, but I'm experiencing technical difficulties. Please try rephrasing your question about financial planning.",
-            used_user_data=False
-        )
+        return SmartChatResponse(message=SMART_CHAT_ERROR_MESSAGE, used_user_data=False)
+
+async def smart_chat_invoke_async(
+    input_text: str, 
+    user_profile: Optional[Dict[str, Any]] = None,
+    history: Optional[List] = None,
+    user_id: Optional[str] = None
+) -> SmartChatResponse:
+    """
+    Async version of smart_chat_invoke - lets callers serve many messages concurrently
+    """
+    try:
+        log_security_event("chat_routing_start", f"Message length: {len(input_text)}", user_id)
+        
+        # Unlike a thread, a cancelled task also aborts the in-flight request
+        speculative_full = None
+        if SPECULATIVE_CHAT and user_profile:
+            speculative_full = asyncio.create_task(secure_chat_ainvoke(input_text, history, user_id))
+        
+        routing_decision: RouterDecision = await route_chat_message_async(input_text, user_id)
+        
+        if not routing_decision.needs_user_data:
+            log_security_event("chat_using_general", f"Message type: {routing_decision.message_type}", user_id)
+            
+            if speculative_full is not None:
+                speculative_full.cancel()
+            
+            if routing_decision.simple_response and len(routing_decision.simple_response.strip()) > 10:
+                return SmartChatResponse(
+                    message=routing_decision.simple_response,
+                    used_user_data=False
+                )
+            
+            general_response: GeneralChatResponse = await get_general_advice_async(input_text, history, user_id)
+            return SmartChatResponse(
+                message=general_response.message,
+                used_user_data=False
+            )
+        
+        log_security_event("chat_using_full_context", f"Message type: {routing_decision.message_type}", user_id)
+        
+        if not user_profile:
+            return SmartChatResponse(message=PROFILE_REQUEST_MESSAGE, used_user_data=False)
+        
+        if speculative_full is not None:
+            full_response: ChatResponse = await speculative_full
+        else:
+            full_response = await secure_chat_ainvoke(input_text, history, user_id)
+        
+        return _from_full_response(full_response)
+        
+    except Exception as e:
+        log_security_event("smart_chat_error", str(e), user_id)
+        return SmartChatResponse(message=SMART_CHAT_ERROR_MESSAGE, used_user_data=False)
 
 def get_chat_stats() -> Dict[str, Any]:
     """
@@ -1,11 +1,8 @@
-from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+from chatbot.langchain.model import get_llm
 
-llm = ChatOpenAI(model="gpt-4", temperature=0.3)
+llm = get_llm(temperature=0.3)
 
 msg = [HumanMessage(content="What is 2 + 2?")]
 response = llm.invoke(msg)
@@ -1,15 +1,38 @@
-def get_generate_plan_prompt(user_profile: dict, goal_data: dict, format_instructions: str) -> str:
+from chatbot.langchain import _json
+
+# Built once at import; per-request work is a single str.format call
+_USER_PROMPT_TEMPLATE = """
+User Profile:
+{profile}
+
+Goal:
+{goal}
+""".format
+
+def _compact_json(data: dict) -> str:
+    """Compact JSON is ~30% fewer tokens than the Python dict repr"""
+    return _json.dumps(data)
+
+def get_generate_plan_system_prompt(format_instructions: str) -> str:
+    """Static instructions + schema - identical on every request so the prefix can be cached"""
     return f"""
 You are a financial planning assistant.
 
-Using the user's profile and goal details below, generate a detailed and realistic financial plan. 
+Using the user's profile and goal details provided by the user, generate a detailed and realistic financial plan. 
 Respond ONLY with a valid JSON object that matches the schema described.
 
 {format_instructions}
+"""
 
-User Profile:
-{user_profile}
+def get_generate_plan_user_prompt(user_profile: dict, goal_data: dict) -> str:
+    """Per-request part of the plan prompt"""
+    return _USER_PROMPT_TEMPLATE(
+        profile=_compact_json(user_profile),
+        goal=_compact_json(goal_data)
+    )
 
-Goal:
-{goal_data}
-"""
\ No newline at end of file
+def get_generate_plan_prompt(user_profile: dict, goal_data: dict, format_instructions: str) -> str:
+    return (
+        get_generate_plan_system_prompt(format_instructions)
+        + get_generate_plan_user_prompt(user_profile, goal_data)
+    )
@@ -1,10 +1,23 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Literal
 
-class PlanStep(BaseModel):
+# Plan-specific bounds, enforced by the schema while the LLM output is parsed
+MAX_STEPS = 10
+MAX_MILESTONES = 10
+MAX_PLAN_TITLE_LENGTH = 100
+MAX_STEP_DESCRIPTION_LENGTH = 500
+
+class _PlanModel(BaseModel):
+    """
+    Shared config for the plan models: parsed plans are read-only.
+    Unknown keys from the LLM are still ignored rather than rejected.
+    """
+    model_config = ConfigDict(frozen=True)
+
+class PlanStep(_PlanModel):
     id: str
     title: str
-    description: str
+    description: str = Field(..., max_length=MAX_STEP_DESCRIPTION_LENGTH)
     order: int
     timeframe: str
     completed: bool
@@ -12,7 +25,7 @@ class PlanStep(BaseModel):
     cost: Optional[float] = None
     resources: Optional[List[str]] = None
 
-class PlanMilestone(BaseModel):
+class PlanMilestone(_PlanModel):
     id: str
     title: str
     description: str
@@ -21,20 +34,20 @@ class PlanMilestone(BaseModel):
     completed: bool
     completedDate: Optional[str] = None
 
-class PlanResource(BaseModel):
+class PlanResource(_PlanModel):
     type: Literal['link', 'document', 'tool', 'contact']
     title: str
     url: Optional[str] = None
     description: Optional[str] = None
 
-class Plan(BaseModel):
-    title: str
+class Plan(_PlanModel):
+    title: str = Field(..., max_length=MAX_PLAN_TITLE_LENGTH)
     description: str
     timeframe: str
     category: Literal['investment', 'savings', 'debt', 'income', 'budget', 'mixed']
     priority: Literal['high', 'medium', 'low']
-    steps: List[PlanStep]
-    milestones: List[PlanMilestone]
+    steps: List[PlanStep] = Field(..., max_length=MAX_STEPS)
+    milestones: List[PlanMilestone] = Field(..., max_length=MAX_MILESTONES)
     estimatedCost: Optional[float] = None
     expectedReturn: Optional[float] = None
     riskLevel: Literal['low', 'medium', 'high']
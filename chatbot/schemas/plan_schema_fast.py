@@ -0,0 +1,54 @@
+"""
+msgspec mirrors of the Plan schema for fast decoding of LLM output
+Field names, types and defaults must stay in sync with plan_schema.py
+"""
+
+import msgspec
+from typing import Annotated, List, Optional, Literal
+
+from chatbot.schemas.plan_schema import (
+    MAX_STEPS,
+    MAX_MILESTONES,
+    MAX_PLAN_TITLE_LENGTH,
+    MAX_STEP_DESCRIPTION_LENGTH
+)
+
+class PlanStepStruct(msgspec.Struct, kw_only=True):
+    id: str
+    title: str
+    description: Annotated[str, msgspec.Meta(max_length=MAX_STEP_DESCRIPTION_LENGTH)]
+    order: int
+    timeframe: str
+    completed: bool
+    dueDate: Optional[str] = None
+    cost: Optional[float] = None
+    resources: Optional[List[str]] = None
+
+class PlanMilestoneStruct(msgspec.Struct, kw_only=True):
+    id: str
+    title: str
+    description: str
+    targetAmount: Optional[float] = None
+    targetDate: str
+    completed: bool
+    completedDate: Optional[str] = None
+
+class PlanResourceStruct(msgspec.Struct, kw_only=True):
+    type: Literal['link', 'document', 'tool', 'contact']
+    title: str
+    url: Optional[str] = None
+    description: Optional[str] = None
+
+class PlanStruct(msgspec.Struct, kw_only=True):
+    title: Annotated[str, msgspec.Meta(max_length=MAX_PLAN_TITLE_LENGTH)]
+    description: str
+    timeframe: str
+    category: Literal['investment', 'savings', 'debt', 'income', 'budget', 'mixed']
+    priority: Literal['high', 'medium', 'low']
+    steps: Annotated[List[PlanStepStruct], msgspec.Meta(max_length=MAX_STEPS)]
+    milestones: Annotated[List[PlanMilestoneStruct], msgspec.Meta(max_length=MAX_MILESTONES)]
+    estimatedCost: Optional[float] = None
+    expectedReturn: Optional[float] = None
+    riskLevel: Literal['low', 'medium', 'high']
+    prerequisites: Optional[List[str]] = None
+    resources: Optional[List[PlanResourceStruct]] = None
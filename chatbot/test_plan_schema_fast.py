@@ -0,0 +1,73 @@
+"""
+Offline parity tests: the msgspec plan mirrors must match the Pydantic plan models
+Run with: python -m pytest -q chatbot/test_plan_schema_fast.py
+"""
+
+from typing import Annotated, get_args, get_origin
+
+import msgspec
+import pytest
+
+from chatbot.schemas.plan_schema import Plan, PlanMilestone, PlanResource, PlanStep
+from chatbot.schemas.plan_schema_fast import (
+    PlanMilestoneStruct,
+    PlanResourceStruct,
+    PlanStepStruct,
+    PlanStruct,
+)
+
+MIRRORS = [
+    (PlanStepStruct, PlanStep),
+    (PlanMilestoneStruct, PlanMilestone),
+    (PlanResourceStruct, PlanResource),
+    (PlanStruct, Plan),
+]
+
+# Nested structs compare equal to the model they mirror
+_MODEL_FOR_STRUCT = {struct: model for struct, model in MIRRORS}
+
+def _comparable(annotation):
+    """Annotation with constraints stripped and nested structs replaced by their models"""
+    if get_origin(annotation) is Annotated:
+        return _comparable(get_args(annotation)[0])
+    if annotation in _MODEL_FOR_STRUCT:
+        return _MODEL_FOR_STRUCT[annotation]
+    args = get_args(annotation)
+    if not args:
+        return annotation
+    return (get_origin(annotation), tuple(_comparable(arg) for arg in args))
+
+def _struct_max_length(annotation):
+    if get_origin(annotation) is not Annotated:
+        return None
+    metas = [meta for meta in get_args(annotation)[1:] if isinstance(meta, msgspec.Meta)]
+    return next((meta.max_length for meta in metas if meta.max_length is not None), None)
+
+def _model_max_length(field):
+    return next((meta.max_length for meta in field.metadata if hasattr(meta, "max_length")), None)
+
+def _struct_fields(struct):
+    return {
+        field.name: (
+            _comparable(field.type),
+            _struct_max_length(field.type),
+            field.required,
+            None if field.required else field.default,
+        )
+        for field in msgspec.structs.fields(struct)
+    }
+
+def _model_fields(model):
+    return {
+        name: (
+            _comparable(field.annotation),
+            _model_max_length(field),
+            field.is_required(),
+            None if field.is_required() else field.default,
+        )
+        for name, field in model.model_fields.items()
+    }
+
+@pytest.mark.parametrize("struct, model", MIRRORS, ids=lambda cls: cls.__name__)
+def test_struct_mirrors_model(struct, model):
+    assert _struct_fields(struct) == _model_fields(model)
@@ -0,0 +1,310 @@
+"""
+Offline tests for the security sanitizers (no API keys or network needed)
+Run with: python -m pytest -q chatbot/test_security.py
+"""
+
+import json
+import random
+import re
+from typing import Any, Dict, List
+
+import pytest
+
+from chatbot.langchain import security
+from chatbot.langchain.security import (
+    BANNED_PHRASES,
+    MAX_ARRAY_LENGTH,
+    MAX_JSON_SIZE,
+    MAX_STRING_LENGTH,
+    SENSITIVE_PATTERNS,
+    SecurityViolationError,
+    build_sanitizer,
+    sanitize_dict,
+)
+from chatbot.schemas.plan_schema import Plan
+
+# Reference implementation: the original recursive sanitizers, kept verbatim so the
+# iterative walk can be checked against them
+
+def _reference_sanitize_string(text: str, max_length: int = MAX_STRING_LENGTH) -> str:
+    if not isinstance(text, str):
+        raise SecurityViolationError("Input must be a string")
+    if len(text) > max_length:
+        raise SecurityViolationError(f"String too long. Maximum {max_length} characters allowed")
+    for pattern in SENSITIVE_PATTERNS:
+        if re.search(pattern, text, re.IGNORECASE):
+            raise SecurityViolationError("String contains potentially sensitive information")
+    for phrase in BANNED_PHRASES:
+        if phrase.lower() in text.lower():
+            raise SecurityViolationError(f"String contains banned phrase: {phrase}")
+    return text.strip()
+
+def _reference_sanitize_dict(data: Dict[str, Any], max_size: int = MAX_JSON_SIZE) -> Dict[str, Any]:
+    if not isinstance(data, dict):
+        raise SecurityViolationError("Input must be a dictionary")
+    if len(json.dumps(data, default=str)) > max_size:
+        raise SecurityViolationError(f"Dictionary too large. Maximum {max_size} characters allowed")
+    sanitized = {}
+    for key, value in data.items():
+        clean_key = _reference_sanitize_string(str(key), 100)
+        if isinstance(value, str):
+            clean_value = _reference_sanitize_string(value)
+        elif isinstance(value, dict):
+            clean_value = _reference_sanitize_dict(value, max_size // 2)
+        elif isinstance(value, list):
+            clean_value = _reference_sanitize_list(value)
+        elif isinstance(value, (int, float, bool)):
+            clean_value = value
+        elif value is None:
+            clean_value = None
+        else:
+            clean_value = _reference_sanitize_string(str(value))
+        sanitized[clean_key] = clean_value
+    return sanitized
+
+def _reference_sanitize_list(data: List[Any]) -> List[Any]:
+    if not isinstance(data, list):
+        raise SecurityViolationError("Input must be a list")
+    if len(data) > MAX_ARRAY_LENGTH:
+        raise SecurityViolationError(f"List too long. Maximum {MAX_ARRAY_LENGTH} items allowed")
+    sanitized = []
+    for item in data:
+        if isinstance(item, str):
+            sanitized.append(_reference_sanitize_string(item))
+        elif isinstance(item, dict):
+            sanitized.append(_reference_sanitize_dict(item))
+        elif isinstance(item, list):
+            sanitized.append(_reference_sanitize_list(item))
+        elif isinstance(item, (int, float, bool)):
+            sanitized.append(item)
+        elif item is None:
+            sanitized.append(None)
+        else:
+            sanitized.append(_reference_sanitize_string(str(item)))
+    return sanitized
+
+# Mostly clean text, with the occasional value that should trip a check
+_CLEAN_STRINGS = [
+    "Build an emergency fund",
+    "  pay down the credit card  ",
+    "Invest 15% of income in index funds",
+    "Review budget monthly",
+    "",
+    "ok",
+]
+_BAD_STRINGS = [
+    "contact me at jane@example.com",
+    "password: hunter2",
+    "card 4111 1111 1111 1111",
+    "see the stack trace below",
+    "DEBUG mode is on",
+    "x" * (MAX_STRING_LENGTH + 1),
+]
+_KEYS = ["title", "description", "steps", "amount", "notes", "meta", "tags"]
+
+def _random_value(rng: random.Random, depth: int) -> Any:
+    kind = rng.random()
+    if depth < 4 and kind < 0.2:
+        return _random_dict(rng, depth + 1)
+    if depth < 4 and kind < 0.35:
+        size = MAX_ARRAY_LENGTH + 1 if rng.random() < 0.03 else rng.randint(0, 4)
+        return [_random_value(rng, depth + 1) for _ in range(size)]
+    if kind < 0.45:
+        return rng.choice([0, 42, -3.5, 1e6, True, False, None])
+    if kind < 0.5:
+        return rng.choice(_BAD_STRINGS)
+    return rng.choice(_CLEAN_STRINGS)
+
+def _random_dict(rng: random.Random, depth: int = 0) -> Dict[str, Any]:
+    data = {}
+    for _ in range(rng.randint(1, 4)):
+        key = rng.choice(_KEYS) if rng.random() < 0.97 else "debug"
+        data[key] = _random_value(rng, depth)
+    return data
+
+def _outcome(sanitize, data):
+    try:
+        return "ok", sanitize(data)
+    except SecurityViolationError:
+        return "raised", None
+
+@pytest.mark.parametrize("seed", range(300))
+def test_sanitize_dict_matches_recursive_reference(seed):
+    data = _random_dict(random.Random(seed))
+    assert _outcome(sanitize_dict, data) == _outcome(_reference_sanitize_dict, data)
+
+def _nested(depth: int, key: str = "m") -> Dict[str, Any]:
+    data = leaf = {}
+    for _ in range(depth):
+        leaf[key] = {}
+        leaf = leaf[key]
+    leaf["notes"] = "  done  "
+    return data
+
+def test_sanitize_dict_handles_deep_nesting():
+    # Deeper than both orjson and the interpreter recursion limit, but under MAX_JSON_SIZE
+    clean = sanitize_dict(_nested(1500))
+    for _ in range(1500):
+        clean = clean["m"]
+    assert clean == {"notes": "done"}
+
+def test_sanitize_dict_rejects_oversized_deep_nesting():
+    with pytest.raises(SecurityViolationError):
+        sanitize_dict(_nested(5000, key="meta"))
+
+# Content-check corpus: every pattern's positive case, near misses and mixed cases
+_CONTENT_SAMPLES = _CLEAN_STRINGS + _BAD_STRINGS[:-1] + [phrase.upper() for phrase in BANNED_PHRASES] + [
+    "store the API-KEY somewhere safe",
+    "tokens are not tokenized",
+    "key abcdefghij0123456789xyz here",
+    "abcdefghij0123456789",
+    "abcdefghij012345678",
+    "path is ${HOME}/plans",
+    "-----BEGIN CERTIFICATE-----",
+    "Bearer abc-def_123",
+    "<script src=x>alert(1)</script>",
+    "JavaScript:void(0)",
+    "data:image/png;base64,AAAA",
+    "file:///etc/passwd",
+    "open localhost:8080",
+    "localhost is fine",
+    "connect to 127.0.0.1 for the dashboard",
+    "0.0.0.0",
+    "version 127.0.0.10 released",
+    "print('hello') then an error: happened",
+    "stacktrace",
+    "debugging is fun",
+    "sql  error",
+    "Error - but not a colon",
+]
+
+# Non-ASCII text, where re.IGNORECASE case folding and hyperscan's ASCII-only
+# \b/caseless matching could disagree (ſ folds to "s", the Kelvin sign to "k")
+_NON_ASCII_CONTENT_SAMPLES = [
+    "my ſecret is here",
+    "conſole.log",
+    "api_\u212Aey",
+    "ѕecret with a Cyrillic s",
+    "café debug notes",
+    "naïve savings plan",
+    "token\u00e9",
+    "\u00e9password",
+    "Ünïcödé budget",
+]
+
+def _content_result(text: str):
+    try:
+        security._check_content(text, "String")
+    except SecurityViolationError as e:
+        return "sensitive" if "sensitive" in str(e) else "banned"
+    return "clean"
+
+@pytest.mark.skipif(security._CONTENT_DB is None, reason="hyperscan not installed")
+@pytest.mark.parametrize("text", _CONTENT_SAMPLES + _NON_ASCII_CONTENT_SAMPLES)
+def test_hyperscan_and_re_agree(text, monkeypatch):
+    hyperscan_result = _content_result(text)
+    monkeypatch.setattr(security, "_CONTENT_DB", None)
+    assert hyperscan_result == _content_result(text)
+
+def test_case_folded_non_ascii_is_rejected():
+    assert _content_result("my ſecret is here") == "sensitive"
+    assert _content_result("api_\u212Aey") == "sensitive"
+    assert _content_result("conſole.log") == "banned"
+
+def test_re_path_matches_reference(monkeypatch):
+    monkeypatch.setattr(security, "_CONTENT_DB", None)
+    for text in _CONTENT_SAMPLES:
+        try:
+            _reference_sanitize_string(text)
+            expected = "clean"
+        except SecurityViolationError as e:
+            expected = "sensitive" if "sensitive" in str(e) else "banned"
+        assert _content_result(text) == expected, text
+
+def _valid_plan() -> Dict[str, Any]:
+    return {
+        "title": "  Emergency fund  ",
+        "description": "Save three months of expenses",
+        "timeframe": "12 months",
+        "category": "savings",
+        "priority": "high",
+        "steps": [
+            {
+                "id": "step-1",
+                "title": "Open a high-yield account",
+                "description": "Compare rates at three banks",
+                "order": 1,
+                "timeframe": "1 month",
+                "completed": False,
+                "dueDate": None,
+                "cost": 0.0,
+                "resources": ["bank comparison site"],
+            }
+        ],
+        "milestones": [
+            {
+                "id": "milestone-1",
+                "title": "First month saved",
+                "description": "One month of expenses set aside",
+                "targetAmount": 4500,
+                "targetDate": "2026-03-01",
+                "completed": False,
+                "completedDate": None,
+            }
+        ],
+        "estimatedCost": None,
+        "expectedReturn": 4.5,
+        "riskLevel": "low",
+        "prerequisites": None,
+        "resources": [{"type": "tool", "title": "Budget sheet", "url": None, "description": None}],
+    }
+
+_SANITIZE_PLAN = build_sanitizer(Plan)
+
+def _mismatched_plans():
+    """Valid plans bent out of shape one field at a time"""
+    def variant(mutate):
+        plan = _valid_plan()
+        mutate(plan)
+        return plan
+
+    return [
+        _valid_plan(),
+        variant(lambda p: p.update(extra="unexpected key")),
+        variant(lambda p: p.pop("resources")),
+        variant(lambda p: p.update(title=42)),
+        variant(lambda p: p.update(expectedReturn="4.5%")),
+        variant(lambda p: p.update(priority=["high"])),
+        variant(lambda p: p.update(category={"type": ["debug"]})),
+        variant(lambda p: p.update(category="not a category")),
+        variant(lambda p: p.update(category="debug")),
+        variant(lambda p: p.update(riskLevel=None)),
+        variant(lambda p: p.update(steps={"id": "step-1"})),
+        variant(lambda p: p.update(steps=["not a step"])),
+        variant(lambda p: p.update(steps=[{}] * (MAX_ARRAY_LENGTH + 1))),
+        variant(lambda p: p["steps"][0].update(description="see the stack trace")),
+        variant(lambda p: p["steps"][0].update(order="first", notes="  extra  ")),
+        variant(lambda p: p["steps"][0].update(resources="password: hunter2")),
+        variant(lambda p: p["milestones"][0].update(targetAmount=[1, {"x": "  y  "}])),
+        variant(lambda p: p["resources"][0].update(type=["tool"])),
+        variant(lambda p: p.update(prerequisites=["Bearer abc123"])),
+    ]
+
+@pytest.mark.parametrize("plan", _mismatched_plans())
+def test_plan_sanitizer_matches_generic_walk(plan):
+    assert _outcome(_SANITIZE_PLAN, plan) == _outcome(lambda data: sanitize_dict(data, max_size=None), plan)
+
+def test_plan_sanitizer_strips_and_passes_literals():
+    clean = _SANITIZE_PLAN(_valid_plan())
+    assert clean["title"] == "Emergency fund"
+    assert clean["category"] == "savings"
+    assert clean["steps"][0]["resources"] == ["bank comparison site"]
+
+def test_plan_sanitizer_rejects_unhashable_literal_violation():
+    plan = _valid_plan()
+    plan["category"] = {"type": ["debug"]}
+    with pytest.raises(SecurityViolationError):
+        _SANITIZE_PLAN(plan)
+
+def test_plan_sanitizer_falls_back_for_non_dict_input():
+    assert _SANITIZE_PLAN(["  a  ", 1]) == ["a", 1]
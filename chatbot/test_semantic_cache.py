@@ -0,0 +1,73 @@
+"""
+Offline tests for the semantic response cache (no API keys or network needed)
+Run with: python -m pytest -q chatbot/test_semantic_cache.py
+"""
+
+import numpy as np
+
+from chatbot.langchain.semantic_cache import SemanticCache
+
+class _OneHotEmbeddings:
+    """Each known question gets its own axis, so only identical questions are similar"""
+    def __init__(self, questions):
+        self._axes = {question: i for i, question in enumerate(questions)}
+
+    def embed_query(self, text):
+        if text not in self._axes:
+            raise RuntimeError("embedding service unavailable")
+        vector = np.zeros(len(self._axes))
+        vector[self._axes[text]] = 2.0  # not unit length - the cache normalizes
+        return vector
+
+def _ask(cache, questions):
+    computed = []
+    for question in questions:
+        cache.get_or_compute(question, lambda q=question: computed.append(q) or q.upper())
+    return computed
+
+def test_ring_buffer_wraps_and_evicts_oldest():
+    cache = SemanticCache(_OneHotEmbeddings("abcde"), threshold=0.99, max_entries=3)
+
+    assert _ask(cache, "abcd") == list("abcd")  # "d" overwrites the slot of "a"
+    assert cache._keys == ["d", "b", "c"]
+    assert _ask(cache, "bcd") == []
+    assert _ask(cache, "a") == ["a"]  # evicted, computed again, overwrites "b"
+    assert _ask(cache, "e") == ["e"]  # overwrites "c"
+    assert cache._keys == ["d", "a", "e"]
+    assert cache._size == 3
+
+def test_evicted_keys_leave_exact_index():
+    cache = SemanticCache(_OneHotEmbeddings("abcde"), threshold=0.99, max_entries=2)
+    _ask(cache, "abcde")
+
+    assert sorted(cache._exact) == ["d", "e"]
+    assert set(cache._exact) == set(cache._keys)
+
+def test_similar_lookup_only_sees_live_rows():
+    cache = SemanticCache(_OneHotEmbeddings("abc"), threshold=0.99, max_entries=2)
+    _ask(cache, "abc")
+
+    # "a" was overwritten in place, so neither its exact entry nor its row match
+    assert cache.get_or_compute("a", lambda: "recomputed") == "recomputed"
+
+def test_entries_without_embedding_are_exact_only():
+    cache = SemanticCache(_OneHotEmbeddings("ab"), threshold=0.99, max_entries=3)
+
+    assert _ask(cache, ["unknown", "a", "unknown", "b"]) == ["unknown", "a", "b"]
+    assert not cache._vectors[0].any()
+
+def test_exact_only_cache_never_embeds():
+    cache = SemanticCache(None, max_entries=2)
+
+    assert _ask(cache, ["What is an IRA?", "what is  an ira?", "b", "c", "What is an IRA?"]) == [
+        "What is an IRA?", "b", "c", "What is an IRA?"
+    ]
+    assert cache._vectors is None
+
+def test_clear_resets_ring_buffer():
+    cache = SemanticCache(_OneHotEmbeddings("abc"), threshold=0.99, max_entries=2)
+    _ask(cache, "abc")
+    cache.clear()
+
+    assert cache._size == 0 and cache._next == 0 and not cache._exact
+    assert _ask(cache, "bc") == ["b", "c"]
@@ -3,9 +3,22 @@ Test script to demonstrate the smart chat routing system
 Shows token savings by routing messages appropriately
 """
 
-from chatbot.langchain.smart_chat import smart_chat_invoke, get_chat_stats
+import asyncio
 
-def test_smart_chat_routing():
+from chatbot.langchain.smart_chat import smart_chat_invoke_async, get_chat_stats
+
+# Messages are sent concurrently; cap in-flight requests to stay under OpenAI rate limits
+MAX_CONCURRENT_REQUESTS = 10
+
+async def _run_all(messages, semaphore, user_profile=None):
+    """Send every message at once (bounded by the semaphore); results keep message order"""
+    async def run_one(msg):
+        async with semaphore:
+            return await smart_chat_invoke_async(msg, user_profile=user_profile, user_id="test_user")
+
+    return await asyncio.gather(*(run_one(msg) for msg in messages))
+
+async def _smart_chat_routing():
     """
     Test the two-layer chat system with different types of messages
     """
@@ -31,12 +44,26 @@ def test_smart_chat_routing():
         "How much emergency fund do I need?"
     ]
     
+    # Mock user profile
+    mock_user_profile = {
+        "age": 30,
+        "income": 75000,
+        "savings": 25000,
+        "debt": 15000,
+        "goals": [{"title": "Buy a house", "target": "2 years"}]
+    }
+    
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    general_responses, personal_responses = await asyncio.gather(
+        _run_all(general_messages, semaphore),
+        _run_all(personal_messages, semaphore, user_profile=mock_user_profile)
+    )
+    
     print("\n🎯 GENERAL MESSAGES (Should use lightweight model):")
     print("-" * 30)
     
-    for msg in general_messages:
+    for msg, response in zip(general_messages, general_responses):
         print(f"\n💬 User: {msg}")
-        response = smart_chat_invoke(msg, user_id="test_user")
         print(f"🤖 Bot: {response.message[:100]}...")
         print(f"📊 Used user data: {response.used_user_data}")
         print(f"💰 Token savings: {'✅ HIGH' if not response.used_user_data else '❌ NONE'}")
@@ -44,18 +71,8 @@ def test_smart_chat_routing():
     print("\n\n🎯 PERSONAL MESSAGES (Should route to full model):")
     print("-" * 30)
     
-    # Mock user profile
-    mock_user_profile = {
-        "age": 30,
-        "income": 75000,
-        "savings": 25000,
-        "debt": 15000,
-        "goals": [{"title": "Buy a house", "target": "2 years"}]
-    }
-    
-    for msg in personal_messages:
+    for msg, response in zip(personal_messages, personal_responses):
         print(f"\n💬 User: {msg}")
-        response = smart_chat_invoke(msg, user_profile=mock_user_profile, user_id="test_user")
         print(f"🤖 Bot: {response.message[:100]}...")
         print(f"📊 Used user data: {response.used_user_data}")
         print(f"💰 Token usage: {'⚡ FULL' if response.used_user_data else '✅ LIGHT'}")
@@ -66,5 +83,8 @@ def test_smart_chat_routing():
     for key, value in stats.items():
         print(f"• {key}: {value}")
 
+def test_smart_chat_routing():
+    asyncio.run(_smart_chat_routing())
+
 if __name__ == "__main__":
     test_smart_chat_routing() 
\ No newline at end of file